@@ -1,16 +1,28 @@
 # -*- coding: utf-8 -*-
 
+import base64
 import datetime
-
-from flask import Blueprint
+import decimal
+import json
+import threading
+import time
+
+import aniso8601
+from flask import Blueprint, Response, request, send_file
+from flask import stream_with_context
 from flask.ext import restful
 from flask.ext.restful import fields as restful_fields
+from flask.ext.restful import inputs
 from flask.ext.restful.reqparse import RequestParser
+from werkzeug.urls import url_encode
 
 from datapackage import DataPackage
 
 from .dal.model import ModelsMaker
-from .utils import to_camelcase, to_underscore
+from .export import FORMATS as EXPORT_FORMATS
+from .profiling import profiler
+from .serializers import ResourceSerializer, Serializer, msgpack
+from .utils import to_camelcase, to_underscore, get_resource_by_name
 from .utils import get_type as get_field_type
 
 # For import *
@@ -83,9 +95,94 @@ TYPES = {
     }
 }
 
+
+def _finite_decimal(value):
+    """Parse a number filter value, rejecting `NaN` and infinities."""
+    try:
+        number = decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise ValueError('Invalid number: {}'.format(value))
+    return number
+
+
+# Map the data types between Data Package and the filters arguments types, so
+# the filters values have the same type of the columns
+ARGUMENT_TYPES = {
+    'string': {
+        'default': unicode
+    },
+    'number': {
+        'default': _finite_decimal
+    },
+    'integer': {
+        'default': int
+    },
+    'boolean': {
+        'default': inputs.boolean
+    },
+    'datetime': {
+        'default': aniso8601.parse_datetime
+    },
+    'date': {
+        'default': aniso8601.parse_date
+    },
+    'time': {
+        'default': aniso8601.parse_time
+    }
+}
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+# Functions used by the serializers to convert the values of each field type
+CONVERTERS = {
+    restful_fields.String: unicode,
+    restful_fields.Float: float,
+    restful_fields.Integer: int,
+    restful_fields.Boolean: bool,
+    restful_fields.Raw: None,
+    DateIso: _isoformat
+}
+
+# Comparison operators of the filters, used as suffixes of the properties
+# names, e.g. `year__gte=2008-01-01`
+OPERATORS = ('gt', 'gte', 'lt', 'lte')
+
+# Aggregation functions of the aggregate resources (`count` is always used)
+AGGREGATES = ('sum', 'avg', 'min', 'max')
+# Data Package types that can be summed and averaged
+NUMERIC_TYPES = ('number', 'integer')
+
+# Mimetypes of the list resources responses
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+CSV = 'text/csv'
+MSGPACK = 'application/x-msgpack'
+
+# Mimetypes offered by the resources, the first one being the default
+LIST_MIMETYPES = [JSON, NDJSON, CSV]
+SINGLE_MIMETYPES = [JSON, CSV]
+if msgpack is not None:
+    LIST_MIMETYPES.append(MSGPACK)
+    SINGLE_MIMETYPES.append(MSGPACK)
+# Mimetypes that can be streamed
+STREAM_MIMETYPES = [JSON, NDJSON, CSV]
+
+# Number of rows fetched from the database at a time when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Max number of `_uid`s of a batch lookup
+MAX_BATCH_SIZE = 1000
+
 # Resources types
 SINGLE = 0
 LIST = 1
+AGGREGATE = 2
+EXPORT = 3
 
 
 def add_resource(cls, datapackage, resource_name, type_=LIST):
@@ -94,37 +191,110 @@ def add_resource(cls, datapackage, resource_name, type_=LIST):
     url = '/{}/{}'.format(datapackage_name, resource_name)
     if type_ is SINGLE:
         url = '{}/<pk>'.format(url)
+    elif type_ is AGGREGATE:
+        url = '{}/aggregate'.format(url)
+    elif type_ is EXPORT:
+        url = '{}/export'.format(url)
     print '---> {}{}'.format(API_PREFIX, url)
     magic_api_base.add_resource(cls, url)
 
 
-def filter_dict(dict_, keys):
-    remove = []
-    result = {}
-
-    for key in keys:
-        if key.startswith('-'):
-            remove.append(key)
-        elif key in dict_:
-            result[key] = dict_[key]
-
-    result = result or dict_.copy()
-
-    for key in remove:
-        key = key[1:]
-        if key in result:
-            del result[key]
-
-    return result
+def negotiate(mimetypes):
+    """Return the mimetype of `mimetypes` that best matches `Accept`."""
+    return request.accept_mimetypes.best_match(mimetypes,
+                                               default=mimetypes[0])
+
+
+def dumps_rows(serializer, rows, mimetype):
+    if mimetype == CSV:
+        return serializer.dumps_csv(rows)
+    if mimetype == NDJSON:
+        return ''.join(serializer.iter_ndjson(rows))
+    if mimetype == MSGPACK:
+        return serializer.dumps_many_msgpack(rows)
+    return serializer.dumps_many(rows)
+
+
+def dumps_row(serializer, row, mimetype):
+    if mimetype == CSV:
+        return serializer.dumps_csv([row])
+    if mimetype == MSGPACK:
+        return serializer.dumps_msgpack(row)
+    return serializer.dumps(row)
+
+
+def iter_rows(serializer, rows, mimetype, buffer_size):
+    if mimetype == CSV:
+        return serializer.iter_csv(rows, buffer_size)
+    if mimetype == NDJSON:
+        return serializer.iter_ndjson(rows, buffer_size)
+    return serializer.iter_json(rows, buffer_size)
+
+
+def _encode_cursor_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'date': value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {'time': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'decimal': str(value)}
+    raise TypeError(repr(value))
+
+
+def _decode_cursor_value(dict_):
+    if 'datetime' in dict_:
+        return aniso8601.parse_datetime(dict_['datetime'])
+    if 'date' in dict_:
+        return aniso8601.parse_date(dict_['date'])
+    if 'time' in dict_:
+        return aniso8601.parse_time(dict_['time'])
+    if 'decimal' in dict_:
+        return decimal.Decimal(dict_['decimal'])
+    return dict_
+
+
+def encode_cursor(values):
+    """Encode the sort key values of a row as an opaque string."""
+    value = json.dumps(values, default=_encode_cursor_value,
+                       separators=(',', ':'))
+    return base64.urlsafe_b64encode(value).rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor created by `encode_cursor`."""
+    cursor = str(cursor)
+    cursor += '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor),
+                            object_hook=_decode_cursor_value)
+    except (TypeError, ValueError):
+        restful.abort(400, message='Invalid cursor')
+    if not isinstance(values, list):
+        restful.abort(400, message='Invalid cursor')
+    return values
 
 
 class ResourcesMaker(object):
-    def __init__(self, datapackage, databackend):
+    def __init__(self, datapackage, databackend, cache=None, lazy=False,
+                 counts=None, exporter=None):
         if isinstance(datapackage, basestring):
             datapackage = DataPackage(unicode(datapackage))
         self.datapackage = datapackage
         self.models_maker = ModelsMaker(datapackage, backend=databackend)
+        # `ResponseCache` used by the resources, if any
+        self.cache = cache
+        # `CountCache` of the totals of the list resources, if any
+        self.counts = counts
+        # `Exporter` of the export resources, if any
+        self.exporter = exporter
+        # Create the models and resources classes on their first request
+        self.lazy = lazy
         self._resources = {}
+        # Resources classes of each Data Package resource, by type
+        self._classes = {}
+        self._lock = threading.Lock()
 
     @property
     def resources(self):
@@ -141,50 +311,157 @@ class ResourcesMaker(object):
         self._resources = {}
         for resource_metadata in self.datapackage.resources:
             resource_name = resource_metadata.name
-            model = self.models_maker.get_model(resource_name)
-            list_, single = self._create_classes(model, resource_metadata)
+            if self.lazy:
+                classes = self._create_lazy_classes(resource_name)
+            else:
+                classes = self.get_classes(resource_name)
+            list_, single, aggregate, export = (
+                classes[LIST], classes[SINGLE], classes[AGGREGATE],
+                classes[EXPORT])
             # List
             add_resource(list_, self.datapackage, resource_name, LIST)
             self._resources['{}List'.format(resource_name)] = list_
+            # Aggregate
+            add_resource(aggregate, self.datapackage, resource_name,
+                         AGGREGATE)
+            self._resources['{}Aggregate'.format(resource_name)] = aggregate
+            # Export
+            add_resource(export, self.datapackage, resource_name, EXPORT)
+            self._resources['{}Export'.format(resource_name)] = export
             # Single
             add_resource(single, self.datapackage, resource_name, SINGLE)
             self._resources[resource_name] = single
         return self._resources
 
+    def get_classes(self, resource_name):
+        """Return the resources classes of `resource_name` by type, creating
+        them (and the model) on the first call.
+        """
+        classes = self._classes.get(resource_name)
+        if classes is None:
+            with self._lock:
+                classes = self._classes.get(resource_name)
+                if classes is None:
+                    model = self.models_maker.get_model(resource_name)
+                    resource_metadata = get_resource_by_name(
+                        self.datapackage, resource_name)
+                    list_, single, aggregate, export = self._create_classes(
+                        model, resource_metadata)
+                    classes = self._classes[resource_name] = {
+                        LIST: list_,
+                        SINGLE: single,
+                        AGGREGATE: aggregate,
+                        EXPORT: export
+                    }
+        return classes
+
+    def warmup(self):
+        """Create every model and resource class, and read a row of each
+        resource, so the first requests don't pay for it.
+
+        Return a list of `(resource_name, seconds)`.
+        """
+        timings = []
+        for resource_metadata in self.datapackage.resources:
+            start = time.time()
+            resource_name = resource_metadata.name
+            self.get_classes(resource_name)
+            model = self.models_maker.get_model(resource_name)
+            model.queryset.limit(1).values()
+            timings.append((resource_name, time.time() - start))
+        return timings
+
+    def _create_lazy_classes(self, resource_name):
+        """Create resources classes that dispatch the requests to the real
+        ones, created by `get_classes` on the first request.
+        """
+        resources_maker = self
+        classname = to_camelcase(resource_name)
+        classes = {}
+        for type_, name in ((LIST, '{}List'), (SINGLE, '{}'),
+                            (AGGREGATE, '{}Aggregate'),
+                            (EXPORT, '{}Export')):
+            def dispatch_request(self, *args, **kwargs):
+                cls = resources_maker.get_classes(resource_name)[self.type_]
+                return cls().dispatch_request(*args, **kwargs)
+
+            # The same name of the real class, used as endpoint
+            classes[type_] = type(name.format(classname),
+                                  (restful.Resource, ), {
+                'methods': ['GET', 'POST'] if type_ is LIST else ['GET'],
+                'type_': type_,
+                'dispatch_request': dispatch_request
+            })
+        return classes
+
     def _create_classes(self, model, resource_metadata):
         resource_name = resource_metadata.name
         classname = to_camelcase(resource_name)
 
-        # Create Resource List class
-        list_parser = RequestParser()
+        # Arguments shared by the List and Aggregate resources
+        filters_parser = RequestParser()
+        # Batch lookup, like `?_uid=1&_uid=2`
+        filters_parser.add_argument('_uid', action='append', type=int)
 
         fields = {
-            '_uid': restful_fields.Integer  # Internal id
+            '_uid': restful_fields.Integer(attribute='_uid')  # Internal id
+        }
+        # Properties in schema order
+        property_names = ['_uid']
+        # Map JSON properties to SQLAlchemy columns
+        columns = {
+            '_uid': '_uid'
+        }
+        # Data Package type of each property
+        types = {
+            '_uid': 'integer'
         }
         for field in resource_metadata.schema.get('fields', []):
             # JSON properties names are camelCase
             property_name = to_camelcase(field.get('name'), False)
             # but SQLAlchemy columns are snake_case
             column_name = to_underscore(field.get('name'))
-            # Add a filter argument for each column
-            list_parser.add_argument(property_name, action='append')
+            # Add a filter argument for each column, parsing the values to
+            # the column type
+            argument_type = get_field_type(ARGUMENT_TYPES, field) or unicode
+            filters_parser.add_argument(property_name, action='append',
+                                        type=argument_type)
+            for operator in OPERATORS:
+                filters_parser.add_argument(
+                    '{}__{}'.format(property_name, operator),
+                    type=argument_type)
+            columns[property_name] = column_name
+            types[property_name] = field.get('type')
+            property_names.append(property_name)
             # Map JSON properties to SQLAlchemy columns
             args = []
             kwargs = {'attribute': column_name}
             fields[property_name] = get_field_type(TYPES, field)(*args,
                                                                  **kwargs)
 
-        # Expect pagination arguments
-        list_parser.add_argument('page', type=int, default=0)
-        list_parser.add_argument('per_page', type=int, default=100)
-        list_parser.add_argument('select', type=str,
-                                 default=','.join(fields.keys()))
-
-        def get_list(self):
-            args = list_parser.parse_args()
-            query = self.__model__.queryset
-
-            # Filters
+        # Compile the serializer once, instead of marshalling every request
+        converters = {property_name: CONVERTERS.get(type(field))
+                      for property_name, field in fields.items()}
+        serializer = ResourceSerializer([
+            (property_name, columns[property_name], converters[property_name])
+            for property_name in property_names])
+
+        def filters_key(args):
+            """Normalized filters of `args`, to memoize the counts."""
+            key = []
+            for argument in filters_parser.args:
+                value = args[argument.name]
+                if isinstance(value, list):
+                    value = tuple(sorted(set(value)))
+                if value is not None:
+                    key.append((argument.name, value))
+            return tuple(key)
+
+        def apply_filters(query, args):
+            # Every filter is ANDed, in the order chosen by the backend
+            predicates = []
+            if args['_uid'] is not None:
+                predicates.append(('in', '_uid', args['_uid']))
             for field in resource_metadata.schema.get('fields', []):
                 # JSON properties names are camelCase
                 property_name = to_camelcase(field.get('name'), False)
@@ -193,21 +470,166 @@ class ResourcesMaker(object):
                 # Get the argument value from URL query, if any
                 values = args[property_name]
                 if values is not None:
-                    query = query.in_(**{column_name: values})
+                    predicates.append(('in', column_name, values))
+                # Comparisons
+                for operator in OPERATORS:
+                    value = args['{}__{}'.format(property_name, operator)]
+                    if value is not None:
+                        predicates.append((operator, column_name, value))
+            if not predicates:
+                return query
+            return query.where(predicates)
 
-            # Pagination
-            query = query.offset(args['page'] * args['per_page'])
-            query = query.limit(args['per_page'])
+        # Create Resource List class
+        list_parser = filters_parser.copy()
 
-            result = query.all()
+        # Expect pagination arguments
+        list_parser.add_argument('page', type=int, default=0)
+        list_parser.add_argument('per_page', type=int, default=100)
+        list_parser.add_argument('select', type=str,
+                                 default=','.join(fields.keys()))
+        # Keyset pagination: `order` is a comma separated list of the sort
+        # properties (prefixed with `-` for descending order) and `cursor` is
+        # the value returned in the `X-Next-Cursor` header of the previous
+        # page.
+        list_parser.add_argument('order', type=str, default='_uid')
+        list_parser.add_argument('cursor', type=str)
+        # Stream the rows as they are fetched (always done for NDJSON). When
+        # streaming, `per_page=0` returns all the rows.
+        list_parser.add_argument('stream', type=inputs.boolean, default=False)
+        # Send the number of rows matching the filters in `X-Total-Count`
+        list_parser.add_argument('total', type=inputs.boolean, default=False)
+
+        counts = self.counts
 
-            # Display only the selected fields
-            selected_fields = filter_dict(fields, args['select'].split(','))
+        def get_list(self):
+            with profiler.phase('parse'):
+                args = list_parser.parse_args()
+            query = apply_filters(self.__model__.queryset, args)
+
+            headers = {}
+            if args['total']:
+                with profiler.phase('count'):
+                    if counts is None:
+                        total = query.count()
+                    else:
+                        total = counts.count(self.__model__, query,
+                                             filters_key(args))
+                headers['X-Total-Count'] = str(total)
+
+            # Sorting. `_uid` is used to break ties, so the order is stable.
+            sort_key = []
+            order_by = []
+            for order in args['order'].split(','):
+                property_name = order.lstrip('-')
+                if property_name not in columns:
+                    restful.abort(400,
+                                  message='Invalid order: {}'.format(order))
+                column_name = columns[property_name]
+                sort_key.append(column_name)
+                order_by.append('-{}'.format(column_name)
+                                if order.startswith('-') else column_name)
+            if '_uid' not in sort_key:
+                sort_key.append('_uid')
+                order_by.append('_uid')
 
-            return restful.marshal(result, selected_fields)
+            # Pagination
+            if args['cursor'] is None:
+                query = query.seek(order_by)
+                query = query.offset(args['page'] * args['per_page'])
+            elif args['cursor']:
+                values = decode_cursor(args['cursor'])
+                if len(values) != len(sort_key):
+                    restful.abort(400, message='Invalid cursor')
+                query = query.seek(order_by, values)
+            else:
+                # Empty cursor: first page
+                query = query.seek(order_by)
+
+            mimetype = negotiate(LIST_MIMETYPES)
+            stream = args['stream'] or mimetype == NDJSON
+            if stream and mimetype not in STREAM_MIMETYPES:
+                mimetype = JSON
+            if args['per_page'] or not stream:
+                query = query.limit(args['per_page'])
+
+            # Load only the selected fields (and the sort key, for the cursor)
+            selected = serializer.select(args['select'])
+            column_names = set(column_name for _, column_name, _
+                               in selected.properties)
+            query = query.only(*column_names.union(sort_key))
+
+            if stream:
+                # The rows are written as they are fetched, so there is no
+                # next cursor, since the headers are sent before the last row
+                rows = query.iterate(STREAM_BATCH_SIZE)
+                body = iter_rows(selected, rows, mimetype, STREAM_BATCH_SIZE)
+                return Response(stream_with_context(body), headers=headers,
+                                mimetype=mimetype)
+
+            # Rows are read-only, so skip the ORM objects creation
+            with profiler.phase('query'):
+                result = query.values()
+
+            if result and len(result) == args['per_page']:
+                last = result[-1]
+                cursor = encode_cursor([getattr(last, column_name)
+                                        for column_name in sort_key])
+                next_args = request.args.copy()
+                next_args.pop('page', None)
+                next_args['cursor'] = cursor
+                headers['X-Next-Cursor'] = cursor
+                headers['Link'] = '<{}?{}>; rel="next"'.format(
+                    request.base_url, url_encode(next_args))
+
+            with profiler.phase('serialize'):
+                body = dumps_rows(selected, result, mimetype)
+            return Response(body, headers=headers, mimetype=mimetype)
+
+        def post_list(self):
+            """Return the rows of a list of `_uid`s, in the same order, with
+            a single query. The body is a JSON list of `_uid`s, or an object
+            like `{"_uid": [1, 2], "select": "_uid,cpi"}`.
+            """
+            with profiler.phase('parse'):
+                body = request.get_json(force=True, silent=True)
+                select = request.args.get('select')
+                if isinstance(body, dict):
+                    select = body.get('select', select)
+                    body = body.get('_uid')
+                if not isinstance(body, list):
+                    restful.abort(400, message='Expected a list of _uid')
+                if len(body) > MAX_BATCH_SIZE:
+                    restful.abort(400, message='Too many _uid, the maximum '
+                                  'is {}'.format(MAX_BATCH_SIZE))
+                try:
+                    uids = [int(uid) for uid in body]
+                except (TypeError, ValueError):
+                    restful.abort(400, message='Invalid _uid')
+
+            selected = serializer.select(select or ','.join(fields.keys()))
+            column_names = set(column_name for _, column_name, _
+                               in selected.properties)
+            rows = {}
+            if uids:
+                query = self.__model__.queryset.in_(_uid=uids)
+                query = query.only(*column_names.union(['_uid']))
+                with profiler.phase('query'):
+                    rows = {row._uid: row for row in query.values()}
+
+            # Unknown `_uid`s are skipped
+            result = [rows[uid] for uid in uids if uid in rows]
+            mimetype = negotiate(LIST_MIMETYPES)
+            with profiler.phase('serialize'):
+                body = dumps_rows(selected, result, mimetype)
+            return Response(body, mimetype=mimetype)
+
+        if self.cache is not None:
+            get_list = self.cache.cached(get_list, model)
 
         list_ = type('{}List'.format(classname), (restful.Resource, ), {
             'get': get_list,
+            'post': post_list,
             '__resource_name__': resource_name,
             '__model__': model
         })
@@ -218,14 +640,25 @@ class ResourcesMaker(object):
                                    default=','.join(fields.keys()))
 
         def get_single(self, pk):
-            args = single_parser.parse_args()
+            with profiler.phase('parse'):
+                args = single_parser.parse_args()
             query = self.__model__.queryset
-            result = query.get(pk)
 
-            # Display only the selected fields
-            selected_fields = filter_dict(fields, args['select'].split(','))
+            # Load and display only the selected fields
+            selected = serializer.select(args['select'])
+            query = query.only(*[column_name for _, column_name, _
+                                 in selected.properties])
+
+            with profiler.phase('query'):
+                result = query.get(pk)
 
-            return restful.marshal(result, selected_fields)
+            mimetype = negotiate(SINGLE_MIMETYPES)
+            with profiler.phase('serialize'):
+                body = dumps_row(selected, result, mimetype)
+            return Response(body, mimetype=mimetype)
+
+        if self.cache is not None:
+            get_single = self.cache.cached(get_single, model)
 
         single = type(classname, (restful.Resource, ), {
             'get': get_single,
@@ -233,4 +666,99 @@ class ResourcesMaker(object):
             '__model__': model
         })
 
-        return list_, single
+        # Create Resource Aggregate class
+        aggregate_parser = filters_parser.copy()
+        # Comma separated lists of properties
+        aggregate_parser.add_argument('group_by', type=str)
+        for function in AGGREGATES:
+            aggregate_parser.add_argument(function, type=str)
+
+        def get_aggregate(self):
+            with profiler.phase('parse'):
+                args = aggregate_parser.parse_args()
+            query = apply_filters(self.__model__.queryset, args)
+
+            # Serializer properties: the grouped properties, the number of
+            # rows of each group and the aggregated values, named like
+            # `cpi__avg`
+            properties = []
+            group_by = []
+            for property_name in (args['group_by'] or '').split(','):
+                if not property_name:
+                    continue
+                if property_name not in columns:
+                    restful.abort(400, message='Invalid group_by: {}'.format(
+                        property_name))
+                column_name = columns[property_name]
+                group_by.append(column_name)
+                properties.append((property_name, column_name,
+                                   converters[property_name]))
+
+            aggregates = {'count': ('count', None)}
+            properties.append(('count', 'count', int))
+            for function in AGGREGATES:
+                for property_name in (args[function] or '').split(','):
+                    if not property_name:
+                        continue
+                    numeric = types.get(property_name) in NUMERIC_TYPES
+                    if (property_name not in columns or
+                            function in ('sum', 'avg') and not numeric):
+                        restful.abort(400, message='Invalid {}: {}'.format(
+                            function, property_name))
+                    label = '{}__{}'.format(property_name, function)
+                    aggregates[label] = (function, columns[property_name])
+                    if function == 'avg':
+                        converter = float
+                    else:
+                        converter = converters[property_name]
+                    properties.append((label, label, converter))
+
+            with profiler.phase('query'):
+                result = query.aggregate(group_by, **aggregates)
+
+            mimetype = negotiate(LIST_MIMETYPES)
+            with profiler.phase('serialize'):
+                body = dumps_rows(Serializer(properties), result, mimetype)
+            return Response(body, mimetype=mimetype)
+
+        if self.cache is not None:
+            get_aggregate = self.cache.cached(get_aggregate, model)
+
+        aggregate = type('{}Aggregate'.format(classname),
+                         (restful.Resource, ), {
+            'get': get_aggregate,
+            '__resource_name__': resource_name,
+            '__model__': model
+        })
+
+        # Create Resource Export class
+        export_parser = RequestParser()
+        export_parser.add_argument('format', type=str,
+                                   choices=sorted(EXPORT_FORMATS))
+        exporter = self.exporter
+
+        def get_export(self):
+            """Send the whole resource as an Arrow IPC or Parquet file."""
+            if exporter is None:
+                restful.abort(501, message='Exports require pyarrow')
+            args = export_parser.parse_args()
+            format_ = args['format']
+            if format_ is None:
+                mimetype = negotiate([EXPORT_FORMATS[name][0]
+                                      for name in ('arrow', 'parquet')])
+                format_ = ('parquet' if mimetype == EXPORT_FORMATS[
+                    'parquet'][0] else 'arrow')
+            mimetype, extension = EXPORT_FORMATS[format_]
+            path = exporter.export(self.__model__, format_)
+            return send_file(path, mimetype=mimetype, as_attachment=True,
+                             attachment_filename='{}.{}'.format(
+                                 resource_name, extension),
+                             conditional=True)
+
+        export = type('{}Export'.format(classname), (restful.Resource, ), {
+            'get': get_export,
+            '__resource_name__': resource_name,
+            '__model__': model
+        })
+
+        return list_, single, aggregate, export
@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 
 from flask import Flask, request, render_template
 from flask.ext.babel import Babel
 from flask.ext.cors import CORS
+from werkzeug.contrib.cache import RedisCache
 
 from .config import DefaultConfig, INSTANCE_FOLDER_PATH
 from .extensions import db
 from ..api import magic_api, ResourcesMaker
-from ..dal.backends import SQLAlchemyBackend
+from ..cache import LRUCache, ResponseCache, CountCache
+from ..compression import Compress
+from ..export import Exporter, pyarrow
+from ..dal.backends import SQLAlchemyBackend, PandasBackend, DuckDBBackend
+from ..packages import load_datapackage
+from ..profiling import profiler
 
 # For import *
 __all__ = ['create_app']
@@ -18,7 +25,7 @@ DEFAULT_BLUEPRINTS = []
 
 
 def create_app(config=None, app_name=None, datapackage=None, backend=None,
-               instance_folder=None, blueprints=None):
+               instance_folder=None, blueprints=None, offline=None):
     """Create a Flask app."""
 
     if app_name is None:
@@ -34,14 +41,24 @@ def create_app(config=None, app_name=None, datapackage=None, backend=None,
     app = Flask(__name__, instance_path=instance_folder,
                 instance_relative_config=True)
 
+    # Seconds spent in each phase of the startup
+    timings = []
+    start = time.time()
+
     configure_app(app, config)
+    if offline:
+        app.config['DATAPACKAGE_OFFLINE'] = True
     configure_extensions(app)
     configure_blueprints(app, blueprints)
     configure_logging(app)
     #configure_error_handlers(app)
     configure_cors(app)
-    configure_resources(app, datapackage, backend)
+    timings.append(('app', time.time() - start))
+    configure_resources(app, datapackage, backend, timings)
 
+    app._startup_timings = timings
+    print '---> Startup: {}'.format(', '.join(
+        '{} {:.2f}s'.format(phase, elapsed) for phase, elapsed in timings))
     return app
 
 
@@ -72,6 +89,12 @@ def configure_extensions(app):
     # flask-sqlalchemy
     db.init_app(app)
 
+    # Server-Timing headers and metrics, if PROFILING is set
+    profiler.init_app(app)
+
+    # gzip, if GZIP_MIN_SIZE is set
+    Compress(app)
+
     # flask-babel
     babel = Babel(app)
 
@@ -139,15 +162,89 @@ def configure_cors(app):
     cors = CORS(app, resources={r"*": {"origins": "*"}})
 
 
-def configure_resources(app, datapackage, backend):
+def configure_response_cache(app):
+    """Configure the cache of the API resources responses."""
+    cache_type = app.config.get('RESPONSE_CACHE')
+    timeout = app.config.get('RESPONSE_CACHE_TIMEOUT')
+    if not cache_type:
+        return None
+    elif cache_type == 'lru':
+        cache = LRUCache(app.config.get('RESPONSE_CACHE_SIZE'), timeout)
+    elif cache_type == 'redis':
+        cache = RedisCache(app.config.get('RESPONSE_CACHE_REDIS_HOST'),
+                           app.config.get('RESPONSE_CACHE_REDIS_PORT'),
+                           default_timeout=timeout)
+    else:
+        raise RuntimeError()
+    interval = app.config.get('RESPONSE_CACHE_VERSION_CHECK_INTERVAL')
+    return ResponseCache(cache, timeout, version_check_interval=interval)
+
+
+def configure_count_cache(app):
+    """Configure the cache of the number of rows of each filters set."""
+    size = app.config.get('COUNT_CACHE_SIZE')
+    if not size:
+        return None
+    interval = app.config.get('RESPONSE_CACHE_VERSION_CHECK_INTERVAL')
+    return CountCache(LRUCache(size, 0), version_check_interval=interval)
+
+
+def configure_exporter(app):
+    """Configure the Arrow and Parquet exports, if pyarrow is installed."""
+    if pyarrow is None or not app.config.get('EXPORTS'):
+        return None
+    interval = app.config.get('RESPONSE_CACHE_VERSION_CHECK_INTERVAL')
+    return Exporter(os.path.join(app.instance_path, 'exports'),
+                    version_check_interval=interval)
+
+
+def configure_datapackage(app, datapackage):
+    """Load the Data Package, keeping local copies of its remote files."""
+    if not isinstance(datapackage, basestring):
+        return datapackage
+    cache_dir = None
+    if app.config.get('DATAPACKAGE_CACHE'):
+        cache_dir = os.path.join(app.instance_path, 'datapackages')
+    return load_datapackage(datapackage, cache_dir,
+                            max_age=app.config.get('DATAPACKAGE_CACHE_MAX_AGE'),
+                            offline=app.config.get('DATAPACKAGE_OFFLINE'))
+
+
+def configure_resources(app, datapackage, backend, timings=None):
     """Configure the automatic API resources maker."""
+    if timings is None:
+        timings = []
+    start = time.time()
+    datapackage = configure_datapackage(app, datapackage)
+    timings.append(('datapackage', time.time() - start))
+
+    start = time.time()
     with app.app_context():
         if backend == 'SQLAlchemy':
-            backend = SQLAlchemyBackend(db.session, db.metadata)
+            backend = SQLAlchemyBackend(
+                db.session, db.metadata,
+                statement_cache_size=app.config.get('STATEMENT_CACHE_SIZE'))
+        elif backend == 'Pandas':
+            backend = PandasBackend()
+        elif backend == 'DuckDB':
+            backend = DuckDBBackend(app.config.get('DUCKDB_DATABASE'),
+                                    app.config.get('DUCKDB_READ_ONLY'))
         else:
             raise RuntimeError()
-        resources_maker = ResourcesMaker(datapackage, backend)
+        cache = configure_response_cache(app)
+        counts = configure_count_cache(app)
+        exporter = configure_exporter(app)
+        resources_maker = ResourcesMaker(
+            datapackage, backend, cache=cache,
+            lazy=app.config.get('LAZY_RESOURCES'), counts=counts,
+            exporter=exporter)
         resources_maker.create_resources()
+        timings.append(('resources', time.time() - start))
+
+        if app.config.get('WARMUP_RESOURCES'):
+            start = time.time()
+            resources_maker.warmup()
+            timings.append(('warmup', time.time() - start))
 
     app.register_blueprint(magic_api)
     app._resources_maker = resources_maker
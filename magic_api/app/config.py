@@ -38,7 +38,57 @@ class DefaultConfig(BaseConfig):
     # SQLITE for prototyping.
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + INSTANCE_FOLDER_PATH + '/db.sqlite'
 
+    # DuckDB backend. Only one process can open the database to write, so
+    # the API servers can open it read-only once it's imported.
+    DUCKDB_DATABASE = INSTANCE_FOLDER_PATH + '/db.duckdb'
+    DUCKDB_READ_ONLY = False
+
+    # Responses cache: 'lru' (in-process), 'redis' (shared) or None
+    RESPONSE_CACHE = 'lru'
+    RESPONSE_CACHE_SIZE = 1024
+    RESPONSE_CACHE_TIMEOUT = 300
+    RESPONSE_CACHE_REDIS_HOST = 'localhost'
+    RESPONSE_CACHE_REDIS_PORT = 6379
+    # Seconds between checks for new data in the database
+    RESPONSE_CACHE_VERSION_CHECK_INTERVAL = 1
+
+    # Number of row counts (`X-Total-Count`) memoized for each set of
+    # filters, invalidated by the imports. 0 to disable.
+    COUNT_CACHE_SIZE = 4096
+
+    # Number of compiled SQL statements kept by the SQLAlchemy backend, one
+    # for each shape of query (filtered columns, order, selected fields...)
+    STATEMENT_CACHE_SIZE = 256
+
+    # Compress the responses with at least GZIP_MIN_SIZE bytes (and the
+    # streamed ones), when the client accepts gzip. None to disable.
+    GZIP_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+
+    # Export whole resources as Arrow or Parquet files (requires pyarrow),
+    # kept in the instance folder until the next import
+    EXPORTS = True
+
+    # Keep local copies of the remote Data Package files in the instance
+    # folder, revalidated when older than DATAPACKAGE_CACHE_MAX_AGE seconds
+    DATAPACKAGE_CACHE = True
+    DATAPACKAGE_CACHE_MAX_AGE = 300
+    # Only use the local copies, without network access
+    DATAPACKAGE_OFFLINE = False
+
+    # Create the models and resources on their first request, instead of
+    # at startup, optionally warming them up (reading a row of each
+    # resource) before serving requests
+    LAZY_RESOURCES = True
+    WARMUP_RESOURCES = False
+
+    # Time the phases of the requests and the SQL statements, adding a
+    # Server-Timing header to the responses, and serve their histograms
+    PROFILING = False
+    PROFILING_METRICS_URL = '/_metrics'
+
 
 class TestConfig(BaseConfig):
     TESTING = True
     WTF_CSRF_ENABLED = False
+    RESPONSE_CACHE = None
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the import and the resources of each backend, using
+synthetic local Data Packages.
+
+    python -m magic_api.benchmark --rows 100000 --columns string,number,date
+
+The results are written as JSON, to compare them across commits.
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# For import *
+__all__ = ['make_datapackage', 'benchmark_backend', 'run']
+
+
+DATAPACKAGE_NAME = 'benchmark'
+RESOURCE_NAME = 'data'
+# Number of distinct values of the string columns, so they can be filtered
+STRING_CARDINALITY = 100
+DEFAULT_COLUMNS = ('string', 'integer', 'number', 'date', 'boolean')
+DEFAULT_BACKENDS = ('SQLAlchemy', 'Pandas')
+if duckdb is not None:
+    DEFAULT_BACKENDS += ('DuckDB', )
+
+
+def _make_value(type_, random_):
+    if type_ == 'string':
+        return 'value{}'.format(random_.randint(1, STRING_CARDINALITY))
+    if type_ == 'integer':
+        return random_.randint(0, 1000000)
+    if type_ == 'number':
+        return round(random_.uniform(0, 1000), 4)
+    if type_ == 'date':
+        return (datetime.date(2000, 1, 1) +
+                datetime.timedelta(days=random_.randint(0, 7300))).isoformat()
+    if type_ == 'boolean':
+        return random_.choice(('true', 'false'))
+    raise ValueError('Unknown column type: {}'.format(type_))
+
+
+def make_datapackage(path, rows, columns=DEFAULT_COLUMNS, seed=0):
+    """Write a Data Package with a resource of `rows` random rows to `path`.
+
+    `columns` is a list of Data Package types, one for each column. The
+    same `seed` always generates the same data.
+    """
+    random_ = random.Random(seed)
+    fields = [{'name': '{}{}'.format(type_, i), 'type': type_}
+              for i, type_ in enumerate(columns)]
+    descriptor = {
+        'name': DATAPACKAGE_NAME,
+        'resources': [{
+            'name': RESOURCE_NAME,
+            'path': 'data/{}.csv'.format(RESOURCE_NAME),
+            'schema': {'fields': fields}
+        }]
+    }
+    os.makedirs(os.path.join(path, 'data'))
+    with open(os.path.join(path, 'datapackage.json'), 'w') as file_:
+        json.dump(descriptor, file_, indent=2)
+    with open(os.path.join(path, 'data',
+                           '{}.csv'.format(RESOURCE_NAME)), 'wb') as file_:
+        writer = csv.writer(file_)
+        writer.writerow([field['name'] for field in fields])
+        for _ in xrange(rows):
+            writer.writerow([_make_value(type_, random_)
+                             for type_ in columns])
+    return descriptor
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    if not timings:
+        return {}
+
+    def percentile(p):
+        return timings[int(round(p * (len(timings) - 1)))] * 1000
+
+    return {
+        'p50_ms': percentile(0.5),
+        'p99_ms': percentile(0.99),
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'requests': len(timings)
+    }
+
+
+def _time_requests(client, urls):
+    timings = []
+    for url in urls:
+        start = time.time()
+        response = client.get(url)
+        response.get_data()
+        timings.append(time.time() - start)
+        if response.status_code != 200:
+            raise RuntimeError('{} returned {}'.format(url,
+                                                       response.status_code))
+    return timings
+
+
+def benchmark_backend(backend, datapackage_path, rows, columns,
+                      requests=200, per_page=100, seed=0):
+    """Import the Data Package at `datapackage_path` with `backend` and time
+    the resources. Meant to run in its own process (see `run`), so the
+    memory high-water mark is of this backend alone.
+    """
+    # Imported here, so the apps are only created in the child processes
+    from .api import encode_cursor
+    from .app import create_app
+    from .app.extensions import db
+
+    instance_folder = tempfile.mkdtemp(prefix='magic_api_benchmark_')
+
+    class Config(object):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///{}'.format(
+            os.path.join(instance_folder, 'db.sqlite'))
+        DUCKDB_DATABASE = os.path.join(instance_folder, 'db.duckdb')
+        RESPONSE_CACHE = None
+        LAZY_RESOURCES = False
+        PROFILING = False
+
+    try:
+        start = time.time()
+        app = create_app(Config, datapackage=datapackage_path,
+                         backend=backend, instance_folder=instance_folder)
+        startup = time.time() - start
+
+        with app.app_context():
+            models_maker = app._resources_maker.models_maker
+            models_maker.create_models()
+            db.create_all()
+            start = time.time()
+            models_maker.populate()
+            import_time = time.time() - start
+
+        random_ = random.Random(seed)
+        url = '/api/{}/{}'.format(DATAPACKAGE_NAME, RESOURCE_NAME)
+        string_columns = ['{}{}'.format(type_, i)
+                          for i, type_ in enumerate(columns)
+                          if type_ == 'string']
+        client = app.test_client()
+        # The first requests create the database connections
+        _time_requests(client, [url, '{}/1'.format(url)])
+
+        results = {
+            'startup_s': startup,
+            'import_s': import_time,
+            'import_rows_per_s': rows / import_time if import_time else None
+        }
+        results['list'] = _percentiles(_time_requests(client, [
+            '{}?per_page={}&page={}'.format(
+                url, per_page, random_.randint(0, rows // per_page // 10))
+            for _ in xrange(requests)]))
+        if string_columns:
+            results['list_filtered'] = _percentiles(_time_requests(client, [
+                '{}?per_page={}&{}=value{}'.format(
+                    url, per_page, string_columns[0],
+                    random_.randint(1, STRING_CARDINALITY))
+                for _ in xrange(requests)]))
+        results['single'] = _percentiles(_time_requests(client, [
+            '{}/{}'.format(url, random_.randint(1, rows))
+            for _ in xrange(requests)]))
+
+        # Cost of reading pages deep in the resource, with offsets and with
+        # cursors (keyset pagination)
+        deep = {}
+        for fraction in (0, 0.1, 0.5, 0.9):
+            offset = int(rows * fraction) // per_page * per_page
+            repeat = max(requests // 10, 5)
+            deep[str(fraction)] = {
+                'offset': _percentiles(_time_requests(client, [
+                    '{}?per_page={}&page={}'.format(url, per_page,
+                                                    offset // per_page)
+                ] * repeat)),
+                'cursor': _percentiles(_time_requests(client, [
+                    '{}?per_page={}&cursor={}'.format(
+                        url, per_page, encode_cursor([offset]))
+                ] * repeat))
+            }
+        results['deep_pagination'] = deep
+        # Kilobytes on Linux
+        results['max_rss_kb'] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+        return results
+    finally:
+        shutil.rmtree(instance_folder, ignore_errors=True)
+
+
+def _benchmark_process(queue, args):
+    # Keep the standard output for the results
+    sys.stdout = sys.stderr
+    try:
+        queue.put(('ok', benchmark_backend(*args)))
+    except Exception:
+        queue.put(('error', traceback.format_exc()))
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows=10000, columns=DEFAULT_COLUMNS, backends=DEFAULT_BACKENDS,
+        requests=200, per_page=100, seed=0):
+    """Benchmark each backend in its own process, returning the results."""
+    path = tempfile.mkdtemp(prefix='magic_api_datapackage_')
+    try:
+        datapackage_path = os.path.join(path, DATAPACKAGE_NAME)
+        start = time.time()
+        make_datapackage(datapackage_path, rows, columns, seed)
+        results = {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'rows': rows,
+            'columns': list(columns),
+            'requests': requests,
+            'per_page': per_page,
+            'seed': seed,
+            'generate_s': time.time() - start,
+            'backends': {}
+        }
+        for backend in backends:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_benchmark_process,
+                args=(queue, (backend, datapackage_path + '/', rows, columns,
+                              requests, per_page, seed)))
+            process.start()
+            status, result = queue.get()
+            process.join()
+            if status == 'ok':
+                results['backends'][backend] = result
+            else:
+                results['backends'][backend] = {'error': result}
+        return results
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-r', '--rows', type=int, default=10000)
+    parser.add_argument('-c', '--columns', default=','.join(DEFAULT_COLUMNS),
+                        help='Comma separated Data Package types')
+    parser.add_argument('-b', '--backends',
+                        default=','.join(DEFAULT_BACKENDS))
+    parser.add_argument('-n', '--requests', type=int, default=200,
+                        help='Number of requests timed by each test')
+    parser.add_argument('-p', '--per-page', type=int, default=100)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='JSON file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.columns.split(','),
+                  args.backends.split(','), args.requests, args.per_page,
+                  args.seed)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as file_:
+            file_.write(output)
+    else:
+        print output
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+from werkzeug.contrib.cache import BaseCache
+
+# For import *
+__all__ = ['LRUCache', 'DataVersions', 'ResponseCache', 'CountCache']
+
+
+class LRUCache(BaseCache):
+    """In-process cache bounded by the number of items and their age.
+
+    It has the same interface as the Werkzeug caches, so it can be replaced
+    by a shared one, like `werkzeug.contrib.cache.RedisCache`.
+    """
+
+    def __init__(self, max_size=1024, default_timeout=300):
+        super(LRUCache, self).__init__(default_timeout)
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.time():
+                return None
+            # Move the item to the end, as the most recently used
+            self._items[key] = item
+            return value
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.default_timeout
+        expires = time.time() + timeout if timeout else 0
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (expires, value)
+            while len(self._items) > self.max_size:
+                # Remove the least recently used item
+                self._items.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.get(key) is not None:
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._items.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+        return True
+
+
+class DataVersions(object):
+    """Data versions of the models, read from their backend at most once
+    every `check_interval` seconds.
+    """
+
+    def __init__(self, check_interval=1):
+        self.check_interval = check_interval
+        self._versions = {}
+
+    def get(self, model):
+        now = time.time()
+        version, checked = self._versions.get(model, (None, 0))
+        if version is None or now - checked > self.check_interval:
+            backend = model.queryset.backend
+            version = backend.get_data_version(model)
+            self._versions[model] = (version, now)
+        return version
+
+
+class ResponseCache(object):
+    """Cache the responses of the generated resources.
+
+    The cache keys include the data version of the resource model, which is
+    bumped by `ModelsMaker.populate`, so there is no need to invalidate the
+    cache after importing data. The data versions are read from the backend
+    at most once every `version_check_interval` seconds.
+    """
+
+    def __init__(self, cache=None, timeout=None, version_check_interval=1,
+                 key_prefix='magic_api:'):
+        if cache is None:
+            cache = LRUCache()
+        self.cache = cache
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.versions = DataVersions(version_check_interval)
+
+    def data_version(self, model):
+        return self.versions.get(model)
+
+    def make_key(self, model):
+        args = sorted(request.args.items(multi=True))
+        key = repr((request.path, args, request.headers.get('Accept'),
+                    'gzip' in request.accept_encodings,
+                    self.data_version(model)))
+        return hashlib.sha1(key).hexdigest()
+
+    def cached(self, view, model):
+        """Decorate a resource method, serving its responses from the cache
+        and answering `304 Not Modified` when the client has them.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = self.make_key(model)
+            # The key depends on the data version, so it is the ETag
+            etag = key
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = self.cache.get(self.key_prefix + key)
+                if response is not None:
+                    body, status, headers = response
+                    response = Response(body, status=status, headers=headers)
+            if response is not None:
+                _set_etag(response, etag)
+                return response
+
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response):
+                return response
+            if response.status_code == 200 and not response.is_streamed:
+                # Cache the compressed body, so the hits aren't compressed
+                # again
+                compress = current_app.extensions.get('compress')
+                if compress is not None:
+                    response = compress.compress(response)
+                self.cache.set(self.key_prefix + key,
+                               (response.get_data(), response.status_code,
+                                list(response.headers)),
+                               self.timeout)
+            _set_etag(response, etag)
+            return response
+
+        return wrapper
+
+
+def _set_etag(response, etag):
+    # Weak, since the compressed bodies are not byte for byte the same, and
+    # the 304s must send the ETag the client was given. The errors have none.
+    if response.status_code in (200, 304):
+        response.set_etag(etag, weak=True)
+    response.vary.add('Accept')
+    # The key depends on the compression, even if this one is not compressed
+    if 'compress' in current_app.extensions:
+        response.vary.add('Accept-Encoding')
+
+
+class CountCache(object):
+    """Memoize the number of rows of the resources for each set of filters.
+
+    Like `ResponseCache`, the keys include the data version of the resource,
+    so the counts are invalidated by the imports.
+    """
+
+    def __init__(self, cache=None, timeout=None, version_check_interval=1):
+        if cache is None:
+            cache = LRUCache()
+        self.cache = cache
+        self.timeout = timeout
+        self.versions = DataVersions(version_check_interval)
+
+    def count(self, model, query, filters):
+        """Return `query.count()`, where `filters` is a hashable and
+        normalized representation of the filters of `query`.
+        """
+        key = (model.__prefix__, model.__resource__,
+               self.versions.get(model), filters)
+        count = self.cache.get(key)
+        if count is None:
+            count = query.count()
+            self.cache.set(key, count, self.timeout)
+        return count
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import zlib
+
+from flask import request
+
+# For import *
+__all__ = ['Compress']
+
+
+def _compress(data, level):
+    buffer_ = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer_, mode='wb',
+                       compresslevel=level) as file_:
+        file_.write(data)
+    return buffer_.getvalue()
+
+
+def _iter_compress(chunks, level):
+    # A gzip stream: zlib with the gzip header and trailer (wbits=31)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class Compress(object):
+    """Compress the responses with gzip, when the client accepts it.
+
+    The responses are compressed when they have at least `GZIP_MIN_SIZE`
+    bytes, and the streamed ones are always compressed as they are sent. If
+    `GZIP_MIN_SIZE` is `None`, nothing is compressed.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('GZIP_MIN_SIZE')
+        self.level = app.config.get('GZIP_LEVEL', 6)
+        if self.min_size is None:
+            return
+        # Used by the response cache, to store the compressed responses
+        app.extensions['compress'] = self
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        """Compress `response`, if the client accepts gzip."""
+        # Files (`direct_passthrough`) are sent as they are
+        if (response.status_code != 200 or response.direct_passthrough or
+                'Content-Encoding' in response.headers or
+                'gzip' not in request.accept_encodings):
+            return response
+
+        if response.is_streamed:
+            response.response = _iter_compress(response.response, self.level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(_compress(data, self.level))
+
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        # The compressed body is not byte for byte the same
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
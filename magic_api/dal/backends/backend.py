@@ -1,9 +1,46 @@
 # -*- coding: utf-8 -*-
 
 class Backend(object):
-    def populate(self, model):
+    # True if `populate` reads the resource files itself, when it gets no
+    # `data`, instead of the rows parsed by the Data Package
+    reads_resources = False
+
+    def populate(self, model, batch_size=None, data=None):
+        """Import the data of `model`, returning the number of rows.
+
+        `data` is an iterable of rows, read from the Data Package if `None`.
+        """
         raise NotImplementedError()
 
+    def update(self, model, batch_size=None, data=None):
+        """Like `populate`, but only insert, update or delete the rows that
+        changed since the last import.
+        """
+        raise NotImplementedError()
+
+    def get_data_version(self, model):
+        """Return the version of the data of `model`, which changes every
+        time the data is populated.
+        """
+        return getattr(model, '__data_version__', 0)
+
+    def bump_data_version(self, model, fingerprint=None):
+        """Change the data version of `model`, saving the `fingerprint` (a
+        hash of the data) used to skip unchanged data on the next import.
+        """
+        model.__data_version__ = self.get_data_version(model) + 1
+        model.__fingerprint__ = fingerprint
+        return model.__data_version__
+
+    def get_fingerprint(self, model):
+        return getattr(model, '__fingerprint__', None)
+
+    def get_column_stats(self, model):
+        """Return the number of distinct values of each column of `model`,
+        counted by the last import, used to plan the queries.
+        """
+        return {}
+
     @property
     def default_attrs(self):
         return {}
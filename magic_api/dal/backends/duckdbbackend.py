@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+from datapackage import DataPackage
+from datapackage.util import is_local
+
+from .backend import Backend as BaseBackend
+from ..queryset import QuerySet as BaseQuerySet, Row
+from ..model import mapper as basemapper
+from ...packages import CachedDataPackage
+from ...utils import to_underscore, get_resource_by_name
+from ...utils import get_type as get_column_type
+
+
+# For import *
+__all__ = ['populate', 'mapper', 'Base', 'QuerySet', 'Backend']
+
+
+# Table used to store the data version of each table
+VERSIONS_TABLENAME = '_data_versions'
+
+# SQL of the comparison operators
+OPERATORS = {
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<='
+}
+
+
+class BaseMeta(type):
+    def __new__(mcls, name, bases, attrs):
+        cls = super(BaseMeta, mcls).__new__(mcls, name, bases, attrs)
+        datapackage = attrs.get('__datapackage__')
+        if datapackage:
+            if isinstance(datapackage, basestring):
+                datapackage = DataPackage(unicode(datapackage))
+            resource_name = unicode(attrs.get('__resource__'))
+            mapper(cls, datapackage, resource_name)
+            cls.__queryset__ = DuckDBQuerySet
+        return cls
+
+
+class Base(object):
+    __metaclass__ = BaseMeta
+
+    def __init__(self, **kwargs):
+        for (name, value) in kwargs.iteritems():
+            setattr(self, to_underscore(name), value)
+
+
+def _quote(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _order_by(column_name):
+    # DuckDB sorts the NULLs first in both orders, but they are the smallest
+    # values of the seeks, so they are last in descending order
+    if column_name == '-_uid':
+        return '"_uid" DESC'
+    if column_name.startswith('-'):
+        column = _quote(column_name[1:])
+        return '{0} IS NULL, {0} DESC'.format(column)
+    return _quote(column_name)
+
+
+def _parameters(parameters):
+    # The driver only binds unicode strings
+    return [value.decode('utf-8') if isinstance(value, str) else value
+            for value in parameters]
+
+
+class DuckDBBackend(BaseBackend):
+    # Map the data types between Data Package and DuckDB
+    TYPES = {
+        'string': {
+            'default': 'VARCHAR'
+        },
+        'number': {
+            'default': 'DOUBLE'
+        },
+        'integer': {
+            'default': 'BIGINT'
+        },
+        'boolean': {
+            'default': 'BOOLEAN'
+        },
+        'datetime': {
+            'default': 'TIMESTAMP'
+        },
+        'date': {
+            'default': 'DATE'
+        },
+        'time': {
+            'default': 'TIME'
+        }
+    }
+
+    base_class = Base
+
+    # `populate` loads the CSV files with the DuckDB reader
+    reads_resources = True
+
+    def __init__(self, database=':memory:', read_only=False):
+        if duckdb is None:
+            raise RuntimeError('DuckDBBackend requires duckdb')
+        self.connection = duckdb.connect(database, read_only=read_only)
+        # A connection can't run queries from many threads at a time, so
+        # each thread has its own cursor (a connection to the same database)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._versions_table_created = read_only
+
+    def cursor(self):
+        """Return the cursor of the current thread."""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            with self._lock:
+                cursor = self._local.cursor = self.connection.cursor()
+        return cursor
+
+    def execute(self, sql, parameters=()):
+        self.cursor().execute(sql, _parameters(parameters))
+
+    def fetchall(self, sql, parameters=()):
+        return self.cursor().execute(sql, _parameters(parameters)).fetchall()
+
+    def fetchnumpy(self, sql, parameters=()):
+        return self.cursor().execute(sql,
+                                     _parameters(parameters)).fetchnumpy()
+
+    def populate(self, model, batch_size=None, data=None):
+        return populate(model, self, data)
+
+    def update(self, model, batch_size=None, data=None):
+        # Loading the whole table again is as fast as a diff
+        return populate(model, self, data)
+
+    def _create_versions_table(self):
+        if not self._versions_table_created:
+            self.execute('CREATE TABLE IF NOT EXISTS {} (tablename VARCHAR, '
+                         'version BIGINT, fingerprint VARCHAR)'.format(
+                             VERSIONS_TABLENAME))
+            self._versions_table_created = True
+
+    def get_data_version(self, model):
+        self._create_versions_table()
+        rows = self.fetchall('SELECT version FROM {} WHERE tablename = ?'
+                             .format(VERSIONS_TABLENAME),
+                             [model.__tablename__])
+        return rows[0][0] if rows else 0
+
+    def get_fingerprint(self, model):
+        self._create_versions_table()
+        rows = self.fetchall('SELECT fingerprint FROM {} WHERE tablename = ?'
+                             .format(VERSIONS_TABLENAME),
+                             [model.__tablename__])
+        return rows[0][0] if rows else None
+
+    def bump_data_version(self, model, fingerprint=None):
+        self._create_versions_table()
+        version = int(time.time() * 1000)
+        cursor = self.cursor()
+        cursor.begin()
+        try:
+            cursor.execute('DELETE FROM {} WHERE tablename = ?'
+                           .format(VERSIONS_TABLENAME),
+                           _parameters([model.__tablename__]))
+            cursor.execute('INSERT INTO {} VALUES (?, ?, ?)'
+                           .format(VERSIONS_TABLENAME),
+                           _parameters([model.__tablename__, version,
+                                        fingerprint]))
+        except:
+            cursor.rollback()
+            raise
+        cursor.commit()
+        return version
+
+Backend = DuckDBBackend
+
+
+class DuckDBQuerySet(BaseQuerySet):
+    def __init__(self, model, backend, where=(), parameters=(), order=None,
+                 offset=0, limit=None, columns=None):
+        super(DuckDBQuerySet, self).__init__(model, backend)
+        # SQL conditions (joined with AND) and their parameters
+        self._where = where
+        self._parameters = parameters
+        self._order = order
+        self._offset = offset
+        self._limit = limit
+        self._columns = columns
+
+    def _clone(self, **kwargs):
+        attrs = {
+            'where': self._where,
+            'parameters': self._parameters,
+            'order': self._order,
+            'offset': self._offset,
+            'limit': self._limit,
+            'columns': self._columns
+        }
+        attrs.update(kwargs)
+        return DuckDBQuerySet(self.model, self.backend, **attrs)
+
+    def _and(self, condition, parameters):
+        return self._clone(where=self._where + (condition, ),
+                           parameters=self._parameters + tuple(parameters))
+
+    def _where_sql(self):
+        if not self._where:
+            return ''
+        return ' WHERE {}'.format(' AND '.join(self._where))
+
+    def _select(self, columns, offset=None, limit=None):
+        sql = 'SELECT {} FROM {}{}'.format(
+            ', '.join(_quote(column_name) for column_name in columns),
+            _quote(self.model.__tablename__), self._where_sql())
+        if self._order:
+            sql += ' ORDER BY {}'.format(', '.join(
+                _order_by(name) for name in self._order))
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(limit)
+        if offset:
+            sql += ' OFFSET {:d}'.format(offset)
+        return sql
+
+    @property
+    def columns(self):
+        return self._columns or self.model.__columns__
+
+    def get(self, key):
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+        # Only the columns selected by `only`
+        columns = self.columns
+        rows = self.backend.fetchall(
+            'SELECT {} FROM {} WHERE "_uid" = ? LIMIT 1'.format(
+                ', '.join(_quote(column_name) for column_name in columns),
+                _quote(self.model.__tablename__)), [key])
+        if not rows:
+            return None
+        return self.model(**dict(zip(columns, rows[0])))
+
+    def filter(self, **kwargs):
+        queryset = self
+        for column_name, value in kwargs.items():
+            queryset = queryset._and('{} = ?'.format(_quote(column_name)),
+                                     [value])
+        return queryset
+
+    def in_(self, **kwargs):
+        queryset = self
+        for column_name, values in kwargs.items():
+            if not values:
+                queryset = queryset._and('FALSE', [])
+                continue
+            queryset = queryset._and('{} IN ({})'.format(
+                _quote(column_name), ', '.join('?' * len(values))), values)
+        return queryset
+
+    def _compare(self, operator_, kwargs):
+        queryset = self
+        for column_name, value in kwargs.items():
+            queryset = queryset._and('{} {} ?'.format(
+                _quote(column_name), OPERATORS[operator_]), [value])
+        return queryset
+
+    def gt(self, **kwargs):
+        return self._compare('gt', kwargs)
+
+    def gte(self, **kwargs):
+        return self._compare('gte', kwargs)
+
+    def lt(self, **kwargs):
+        return self._compare('lt', kwargs)
+
+    def lte(self, **kwargs):
+        return self._compare('lte', kwargs)
+
+    def limit(self, value):
+        return self._clone(limit=value)
+
+    def offset(self, value):
+        return self._clone(offset=value)
+
+    def only(self, *column_names):
+        columns = [column_name for column_name in self.model.__columns__
+                   if column_name in column_names or column_name == '_uid']
+        return self._clone(columns=columns)
+
+    def seek(self, column_names, values=None):
+        queryset = self._clone(order=list(column_names))
+        if values is None:
+            return queryset
+        # (a, b) > (x, y) is `a > x OR (a = x AND b > y)`, where the NULLs
+        # are the smallest values, like `_order_by` orders them
+        conditions = []
+        parameters = []
+        equals = []
+        equals_parameters = []
+        for column_name, value in zip(column_names, values):
+            descending = column_name.startswith('-')
+            column = _quote(column_name.lstrip('-'))
+            if value is None:
+                if not descending:
+                    conditions.append('({})'.format(' AND '.join(
+                        equals + ['{} IS NOT NULL'.format(column)])))
+                    parameters += equals_parameters
+                equals.append('{} IS NULL'.format(column))
+                continue
+            if descending and column_name != '-_uid':
+                compare = '({0} < ? OR {0} IS NULL)'.format(column)
+            elif descending:
+                compare = '{} < ?'.format(column)
+            else:
+                compare = '{} > ?'.format(column)
+            conditions.append('({})'.format(' AND '.join(equals + [compare])))
+            parameters += equals_parameters + [value]
+            equals.append('{} = ?'.format(column))
+            equals_parameters.append(value)
+        return queryset._and('({})'.format(' OR '.join(conditions) or 'FALSE'),
+                             parameters)
+
+    def all(self):
+        return [self.model(**row) for row in self.values()]
+
+    def values(self):
+        columns = self.columns
+        sql = self._select(columns, self._offset, self._limit)
+        return [Row(zip(columns, row))
+                for row in self.backend.fetchall(sql, self._parameters)]
+
+    def _pages(self, batch_size, numpy=False):
+        """Yield the pages of `batch_size` rows, as lists of tuples or, if
+        `numpy` is true, as dicts of numpy arrays, with the `_uid` column.
+
+        The pages are read in a single transaction, so they are all of the
+        same import.
+        """
+        columns = list(self.columns)
+        if '_uid' not in columns:
+            columns.append('_uid')
+        position = columns.index('_uid')
+        cursor = self.backend.connection.cursor()
+        cursor.begin()
+        try:
+            if self._order and list(self._order) != ['_uid']:
+                # A single query, sliced in pages
+                result = cursor.execute(
+                    self._select(columns, self._offset, self._limit),
+                    _parameters(self._parameters))
+                if numpy:
+                    batch = result.fetchnumpy()
+                    size = len(batch['_uid'])
+                    for start in xrange(0, size, batch_size):
+                        yield columns, {
+                            column_name: values[start:start + batch_size]
+                            for column_name, values in batch.items()}
+                else:
+                    rows = result.fetchall()
+                    for start in xrange(0, len(rows), batch_size):
+                        yield columns, rows[start:start + batch_size]
+                return
+
+            # Keyset pagination on `_uid`, so each page doesn't scan and
+            # sort the previous rows again, like `OFFSET` does
+            queryset = self._clone(order=['_uid'])
+            offset = self._offset
+            remaining = self._limit
+            while remaining is None or remaining > 0:
+                limit = batch_size
+                if remaining is not None:
+                    limit = min(limit, remaining)
+                    remaining -= limit
+                result = cursor.execute(
+                    queryset._select(columns, offset, limit),
+                    _parameters(queryset._parameters))
+                if numpy:
+                    page = result.fetchnumpy()
+                    size = len(page['_uid'])
+                else:
+                    page = result.fetchall()
+                    size = len(page)
+                if not size:
+                    break
+                yield columns, page
+                if size < limit:
+                    break
+                if numpy:
+                    last = page['_uid'][-1]
+                else:
+                    last = page[-1][position]
+                offset = 0
+                queryset = self._clone(order=['_uid'])._and(
+                    '"_uid" > ?', [int(last)])
+        finally:
+            cursor.rollback()
+            cursor.close()
+
+    def iterate(self, batch_size=1000):
+        selected = self.columns
+        for columns, rows in self._pages(batch_size):
+            for row in rows:
+                yield Row((column_name, value) for column_name, value
+                          in zip(columns, row) if column_name in selected)
+
+    def batches(self, batch_size=10000):
+        # The numpy arrays of the columns, without Python objects
+        selected = self.columns
+        for _, batch in self._pages(batch_size, numpy=True):
+            yield {column_name: batch[column_name]
+                   for column_name in selected}
+
+    def aggregate(self, group_by, **aggregates):
+        labels = list(group_by)
+        expressions = [_quote(column_name) for column_name in group_by]
+        for label, (function, column_name) in aggregates.items():
+            if column_name is None:
+                expression = 'count(*)'
+            else:
+                expression = '{}({})'.format(function, _quote(column_name))
+            labels.append(label)
+            expressions.append('{} AS {}'.format(expression, _quote(label)))
+        sql = 'SELECT {} FROM {}{}'.format(
+            ', '.join(expressions), _quote(self.model.__tablename__),
+            self._where_sql())
+        if group_by:
+            columns = ', '.join(_quote(column_name)
+                                for column_name in group_by)
+            sql += ' GROUP BY {0} ORDER BY {0}'.format(columns)
+        return [Row(zip(labels, row))
+                for row in self.backend.fetchall(sql, self._parameters)]
+
+    def count(self):
+        sql = 'SELECT count(*) FROM {}{}'.format(
+            _quote(self.model.__tablename__), self._where_sql())
+        return self.backend.fetchall(sql, self._parameters)[0][0]
+
+QuerySet = DuckDBQuerySet
+
+
+def _local_file(model):
+    """Return the path of the resource file of `model`, if it is local (or
+    in the Data Package cache).
+    """
+    datapackage = model.__datapackage_instance__
+    resource = model.__resource_instance__
+    location = resource.get('url') or resource.get('path')
+    if not location:
+        return None
+    base = datapackage.base or os.curdir
+    if is_local(base) and is_local(location):
+        path = os.path.join(base, location)
+        return path if os.path.isfile(path) else None
+    if not isinstance(datapackage, CachedDataPackage):
+        # Downloaded by the Data Package parser instead
+        return None
+    file_ = datapackage.open_resource(location)
+    try:
+        name = getattr(file_, 'name', None)
+    finally:
+        file_.close()
+    if isinstance(name, basestring) and os.path.isfile(name):
+        return name
+    return None
+
+
+def _write_csv(model, data):
+    """Write the rows of `data` to a temporary CSV file, returning its path.
+    """
+    fields = model.__resource_instance__.schema.get('fields', [])
+    names = [field.get('name') for field in fields]
+    temp = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+    with temp:
+        writer = csv.writer(temp)
+        writer.writerow([to_underscore(name) for name in names])
+        for item in data:
+            row = []
+            for name in names:
+                value = item.get(name)
+                if value is None:
+                    value = ''
+                elif isinstance(value, bool):
+                    value = 'true' if value else 'false'
+                elif isinstance(value, (datetime.date, datetime.time)):
+                    value = value.isoformat()
+                elif isinstance(value, unicode):
+                    value = value.encode('utf-8')
+                row.append(value)
+            writer.writerow(row)
+    return temp.name
+
+
+def populate(model, backend, data=None):
+    """Load the resource of `model` with the DuckDB CSV reader, from its
+    file if it's local, or else from `data` (by default, the rows read by
+    the Data Package).
+    """
+    start = time.time()
+    table = _quote(model.__tablename__)
+    staging = _quote('_{}_staging'.format(model.__tablename__))
+    columns = model.__columns__[1:]
+
+    path = temp = None
+    if data is None:
+        path = _local_file(model)
+    if path is None:
+        if data is None:
+            datapackage = model.__datapackage_instance__
+            data = datapackage.get_data(model.__resource_instance__)
+        path = temp = _write_csv(model, data)
+
+    # Empty fields are read as NULL, but the Data Package parser (and so the
+    # other backends) keeps the empty strings
+    expressions = [
+        "COALESCE({0}, '') AS {0}".format(_quote(column_name))
+        if type_ == 'VARCHAR' else _quote(column_name)
+        for column_name, type_ in zip(columns, model.__column_types__[1:])]
+    cursor = backend.connection.cursor()
+    try:
+        cursor.execute('DROP TABLE IF EXISTS {}'.format(staging))
+        cursor.execute('CREATE TABLE {} ({})'.format(
+            staging, ', '.join(
+                '{} {}'.format(_quote(column_name), type_)
+                for column_name, type_
+                in zip(columns, model.__column_types__[1:]))))
+        cursor.execute("COPY {} FROM '{}' (HEADER)".format(
+            staging, path.replace("'", "''")))
+        # The readers see the previous table until the commit. `_uid` is
+        # the row number in the file (the rowids of the committed staging
+        # table, since they aren't final inside the transaction).
+        cursor.begin()
+        try:
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(table))
+            cursor.execute(
+                'CREATE TABLE {} AS SELECT CAST(rowid + 1 AS BIGINT) AS '
+                '_uid, {} FROM {}'.format(table, ', '.join(expressions),
+                                          staging))
+            total = cursor.execute(
+                'SELECT count(*) FROM {}'.format(table)).fetchall()[0][0]
+        except:
+            cursor.rollback()
+            raise
+        cursor.commit()
+    finally:
+        cursor.execute('DROP TABLE IF EXISTS {}'.format(staging))
+        cursor.close()
+        if temp is not None:
+            os.unlink(temp)
+
+    elapsed = time.time() - start
+    print '---> {}: {} rows in {:.2f}s ({:.0f} rows/s)'.format(
+        model.__tablename__, total, elapsed,
+        total / elapsed if elapsed else 0)
+    return total
+
+
+def mapper(cls, datapackage, resource_name):
+    cls = basemapper(cls, datapackage, resource_name)
+    resource = get_resource_by_name(datapackage, resource_name)
+    if not hasattr(cls, '__tablename__'):
+        prefix = getattr(cls, '__prefix__', datapackage.name)
+        cls.__tablename__ = to_underscore('_'.join([prefix, resource_name]))
+    fields = resource.schema.get('fields', [])
+    cls.__columns__ = ['_uid'] + [to_underscore(field.get('name'))
+                                  for field in fields]
+    cls.__column_types__ = ['BIGINT'] + [
+        get_column_type(DuckDBBackend.TYPES, field) or 'VARCHAR'
+        for field in fields]
+    return cls
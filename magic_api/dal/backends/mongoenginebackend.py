@@ -15,7 +15,10 @@ class Base(object):
 class MongoEngineBackend(BaseBackend):
     TYPES = {}
 
-    def populate(self, model):
+    def populate(self, model, batch_size=None, data=None):
+        raise NotImplementedError()
+
+    def update(self, model, batch_size=None, data=None):
         raise NotImplementedError()
 
 Backend = MongoEngineBackend
@@ -31,15 +34,48 @@ class MongoEngineQuerySet(BaseQuerySet):
     def in_(self, **kwargs):
         raise NotImplementedError()
 
+    def gt(self, **kwargs):
+        raise NotImplementedError()
+
+    def gte(self, **kwargs):
+        raise NotImplementedError()
+
+    def lt(self, **kwargs):
+        raise NotImplementedError()
+
+    def lte(self, **kwargs):
+        raise NotImplementedError()
+
     def limit(self, value):
         raise NotImplementedError()
 
     def offset(self, value):
         raise NotImplementedError()
 
+    def only(self, *column_names):
+        raise NotImplementedError()
+
+    def seek(self, column_names, values=None):
+        raise NotImplementedError()
+
     def all(self):
         raise NotImplementedError()
 
+    def values(self):
+        raise NotImplementedError()
+
+    def iterate(self, batch_size=1000):
+        raise NotImplementedError()
+
+    def batches(self, batch_size=10000):
+        raise NotImplementedError()
+
+    def aggregate(self, group_by, **aggregates):
+        raise NotImplementedError()
+
+    def count(self):
+        raise NotImplementedError()
+
 QuerySet = MongoEngineQuerySet
 
 
@@ -1,51 +1,406 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import operator
+import time
+
+try:
+    import numpy
+    import pandas
+except ImportError:
+    numpy = pandas = None
+from datapackage import DataPackage
+
 from .backend import Backend as BaseBackend
-from ..queryset import QuerySet as BaseQuerySet
+from ..queryset import QuerySet as BaseQuerySet, Row
+from ..model import mapper as basemapper
+from ...utils import to_underscore, get_resource_by_name
+from ...utils import get_type as get_column_type
 
 
 # For import *
 __all__ = ['populate', 'mapper', 'Base', 'QuerySet', 'Backend']
 
 
+class BaseMeta(type):
+    def __new__(mcls, name, bases, attrs):
+        cls = super(BaseMeta, mcls).__new__(mcls, name, bases, attrs)
+        datapackage = attrs.get('__datapackage__')
+        if datapackage:
+            if isinstance(datapackage, basestring):
+                datapackage = DataPackage(unicode(datapackage))
+            resource_name = unicode(attrs.get('__resource__'))
+            mapper(cls, datapackage, resource_name)
+            cls.__queryset__ = PandasQuerySet
+        return cls
+
+
 class Base(object):
-    pass
+    __metaclass__ = BaseMeta
+
+    def __init__(self, **kwargs):
+        for (name, value) in kwargs.iteritems():
+            setattr(self, to_underscore(name), value)
 
 
 class PandasBackend(BaseBackend):
-    TYPES = {}
+    # Map the data types between Data Package and pandas
+    TYPES = {
+        'string': {
+            'default': 'object'
+        },
+        'number': {
+            'default': 'float64'
+        },
+        'integer': {
+            'default': 'int64'
+        },
+        'boolean': {
+            'default': 'bool'
+        },
+        'datetime': {
+            'default': 'datetime64[ns]'
+        },
+        'date': {
+            'default': 'datetime64[ns]'
+        }
+    }
+
+    base_class = Base
+
+    def __init__(self):
+        if pandas is None:
+            raise RuntimeError('PandasBackend requires pandas')
+        self.frames = {}
+
+    def get_frame(self, model):
+        """Return the data frame of `model`, loading it on the first call."""
+        frame = self.frames.get(model)
+        if frame is None:
+            frame = self._load(model)
+        return frame
+
+    def _load(self, model, data=None):
+        frame = self.frames[model] = load_frame(model, data)
+        # The frames are loaded again by each process, so the data version
+        # (used by the disk caches) is a hash of the data, the same in every
+        # process
+        model.__data_version__ = frame_version(frame)
+        return frame
+
+    def get_data_version(self, model):
+        self.get_frame(model)
+        return super(PandasBackend, self).get_data_version(model)
 
-    def populate(self, model):
-        raise NotImplementedError()
+    def populate(self, model, batch_size=None, data=None):
+        return len(self._load(model, data))
+
+    def update(self, model, batch_size=None, data=None):
+        # The frames are in memory, so reloading is as cheap as a diff
+        return self.populate(model, batch_size, data)
 
 Backend = PandasBackend
 
 
 class PandasQuerySet(BaseQuerySet):
+    def __init__(self, model, backend, mask=None, order=None, offset=0,
+                 limit=None, columns=None):
+        super(PandasQuerySet, self).__init__(model, backend)
+        # Boolean array of the rows that match the filters
+        self._mask = mask
+        self._order = order
+        self._offset = offset
+        self._limit = limit
+        self._columns = columns
+
+    @property
+    def frame(self):
+        return self.backend.get_frame(self.model)
+
+    def _clone(self, **kwargs):
+        attrs = {
+            'mask': self._mask,
+            'order': self._order,
+            'offset': self._offset,
+            'limit': self._limit,
+            'columns': self._columns
+        }
+        attrs.update(kwargs)
+        return PandasQuerySet(self.model, self.backend, **attrs)
+
+    def _and(self, mask):
+        if self._mask is not None:
+            mask = self._mask & mask
+        return self._clone(mask=mask)
+
+    def _evaluate(self):
+        frame = self.frame
+        if self._mask is not None:
+            frame = frame[self._mask]
+        if self._order:
+            frame = _sort(frame, self._order)
+        if self._limit is None:
+            frame = frame.iloc[self._offset:]
+        else:
+            frame = frame.iloc[self._offset:self._offset + self._limit]
+        if self._columns:
+            frame = frame[self._columns]
+        return frame
+
     def get(self, key):
-        raise NotImplementedError()
+        frame = self.frame
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+        if key not in frame.index:
+            return None
+        row = _to_rows(self.model, frame.loc[[key]])[0]
+        return self.model(**row)
 
     def filter(self, **kwargs):
-        raise NotImplementedError()
+        frame = self.frame
+        mask = numpy.ones(len(frame), dtype=bool)
+        for column_name, value in kwargs.items():
+            series = frame[column_name]
+            mask &= (series == _coerce(series, [value])[0]).values
+        return self._and(mask)
 
     def in_(self, **kwargs):
-        raise NotImplementedError()
+        frame = self.frame
+        mask = numpy.ones(len(frame), dtype=bool)
+        for column_name, values in kwargs.items():
+            series = frame[column_name]
+            mask &= series.isin(_coerce(series, values)).values
+        return self._and(mask)
+
+    def _compare(self, operator_, kwargs):
+        frame = self.frame
+        mask = numpy.ones(len(frame), dtype=bool)
+        for column_name, value in kwargs.items():
+            series = frame[column_name]
+            mask &= operator_(series, _coerce(series, [value])[0]).values
+        return self._and(mask)
+
+    def gt(self, **kwargs):
+        return self._compare(operator.gt, kwargs)
+
+    def gte(self, **kwargs):
+        return self._compare(operator.ge, kwargs)
+
+    def lt(self, **kwargs):
+        return self._compare(operator.lt, kwargs)
+
+    def lte(self, **kwargs):
+        return self._compare(operator.le, kwargs)
 
     def limit(self, value):
-        raise NotImplementedError()
+        return self._clone(limit=value)
 
     def offset(self, value):
-        raise NotImplementedError()
+        return self._clone(offset=value)
+
+    def only(self, *column_names):
+        columns = [column for column in self.frame.columns
+                   if column in column_names or column == '_uid']
+        return self._clone(columns=columns)
+
+    def seek(self, column_names, values=None):
+        queryset = self._clone(order=list(column_names))
+        if values is None:
+            return queryset
+        # (a, b) > (x, y) is `a > x OR (a = x AND b > y)`, where the NULLs
+        # are the smallest values, like `_sort` orders them
+        frame = self.frame
+        mask = numpy.zeros(len(frame), dtype=bool)
+        equals = numpy.ones(len(frame), dtype=bool)
+        for column_name, value in zip(column_names, values):
+            descending = column_name.startswith('-')
+            series = frame[column_name.lstrip('-')]
+            nulls = series.isnull().values
+            if value is None:
+                if not descending:
+                    mask |= equals & ~nulls
+                equals = equals & nulls
+                continue
+            value = _coerce(series, [value])[0]
+            if descending:
+                compare = (series < value).values | nulls
+            else:
+                compare = (series > value).values
+            mask |= equals & compare
+            equals = equals & (series == value).values
+        return queryset._and(mask)
 
     def all(self):
-        raise NotImplementedError()
+        return [self.model(**row) for row in self.values()]
+
+    def values(self):
+        return _to_rows(self.model, self._evaluate())
+
+    def iterate(self, batch_size=1000):
+        frame = self._evaluate()
+        for start in xrange(0, len(frame), batch_size):
+            for row in _to_rows(self.model, frame.iloc[start:start +
+                                                       batch_size]):
+                yield row
+
+    def batches(self, batch_size=10000):
+        # The numpy arrays of the columns, without Python objects
+        frame = self._evaluate()
+        for start in xrange(0, len(frame), batch_size):
+            batch = frame.iloc[start:start + batch_size]
+            yield {column_name: batch[column_name].values
+                   for column_name in batch.columns}
+
+    def aggregate(self, group_by, **aggregates):
+        frame = self._evaluate()
+        functions = {}
+        for label, (function, column_name) in aggregates.items():
+            # pandas names
+            function = {'avg': 'mean'}.get(function, function)
+            functions[label] = (column_name or '_uid', function)
+        if group_by:
+            grouped = frame.groupby(list(group_by))
+            result = pandas.DataFrame({
+                label: getattr(grouped[column_name], function)()
+                for label, (column_name, function) in functions.items()
+            }).reset_index()
+        else:
+            result = pandas.DataFrame([{
+                label: getattr(frame[column_name], function)()
+                for label, (column_name, function) in functions.items()
+            }])
+        # The min and max of dates are dates too
+        dates = self.model.__date_columns__
+        date_columns = [column_name for column_name in group_by
+                        if column_name in dates]
+        date_columns += [label for label, (column_name, function)
+                         in functions.items()
+                         if column_name in dates and function in ('min', 'max')]
+        return _to_rows(self.model, result, date_columns)
+
+    def count(self):
+        if self._mask is None:
+            return len(self.frame)
+        return int(self._mask.sum())
 
 QuerySet = PandasQuerySet
 
 
-def populate(model):
-    pass
+def _convert(series, dtype):
+    if dtype.startswith('datetime'):
+        return pandas.to_datetime(series, errors='coerce')
+    if dtype in ('int64', 'float64'):
+        series = pandas.to_numeric(series, errors='coerce')
+        if dtype == 'int64' and series.isnull().any():
+            # Integer arrays can't have missing values
+            return series
+    return series.astype(dtype)
+
+
+def _sort(frame, order):
+    """Sort `frame` by the `order` column names, prefixed with `-` for
+    descending order. The NULLs are the smallest values, so they are first
+    in ascending order and last in descending order.
+    """
+    by = []
+    ascending = []
+    keys = {}
+    for i, column_name in enumerate(order):
+        name = column_name.lstrip('-')
+        if frame[name].hasnans:
+            # Sort by whether the values are NULL first
+            key = '__notnull{}'.format(i)
+            keys[key] = frame[name].notnull()
+            by.append(key)
+            ascending.append(not column_name.startswith('-'))
+        by.append(name)
+        ascending.append(not column_name.startswith('-'))
+    if not keys:
+        return frame.sort_values(by, ascending=ascending)
+    frame = frame.assign(**keys).sort_values(by, ascending=ascending)
+    return frame.drop(list(keys), axis=1)
+
+
+def _coerce(series, values):
+    """Convert `values` (e.g. strings from the URL) to the `series` type."""
+    dtype = series.dtype
+    try:
+        if dtype.kind == 'M':
+            return list(pandas.to_datetime(values))
+        if dtype.kind == 'b':
+            return [value in (True, 1, '1', 'true', 'True')
+                    for value in values]
+        if dtype.kind in 'iuf':
+            return list(numpy.asarray(values).astype(dtype))
+    except (TypeError, ValueError):
+        # Values of the wrong type don't match any row
+        return [None] * len(values)
+    return list(values)
+
+
+def _to_rows(model, frame, date_columns=None):
+    if date_columns is None:
+        date_columns = getattr(model, '__date_columns__', [])
+    rows = []
+    for record in frame.to_dict('records'):
+        row = Row()
+        for column_name, value in record.iteritems():
+            if value is None or value is pandas.NaT or value != value:
+                # NaN and NaT are missing values
+                value = None
+            elif isinstance(value, pandas.Timestamp):
+                if column_name in date_columns:
+                    value = value.date()
+                else:
+                    value = value.to_pydatetime()
+            elif isinstance(value, numpy.generic):
+                value = value.item()
+            row[column_name] = value
+        rows.append(row)
+    return rows
+
+
+def load_frame(model, data=None):
+    start = time.time()
+    datapackage = getattr(model, '__datapackage_instance__')
+    resource = getattr(model, '__resource_instance__')
+    fields = resource.schema.get('fields', [])
+    column_names = [to_underscore(field.get('name')) for field in fields]
+    if data is None:
+        data = datapackage.get_data(resource)
+    frame = pandas.DataFrame.from_records(
+        ([item.get(field.get('name')) for field in fields] for item in data),
+        columns=column_names)
+    for field, column_name in zip(fields, column_names):
+        dtype = get_column_type(PandasBackend.TYPES, field)
+        if dtype is not None:
+            frame[column_name] = _convert(frame[column_name], dtype)
+    # Internal id, also used as index for fast lookups
+    uids = numpy.arange(1, len(frame) + 1)
+    frame.insert(0, '_uid', uids)
+    frame.index = pandas.Index(uids)
+    print '---> {}: {} rows in {:.2f}s'.format(
+        model.__resource__, len(frame), time.time() - start)
+    return frame
+
+
+def frame_version(frame):
+    """Return a positive integer hash of the values of `frame`."""
+    hashes = pandas.util.hash_pandas_object(frame, index=False).values
+    return int(hashlib.sha1(hashes.tobytes()).hexdigest()[:15], 16)
+
+
+def populate(model, backend):
+    return backend.populate(model)
 
 
 def mapper(cls, datapackage, resource_name):
-    pass
+    cls = basemapper(cls, datapackage, resource_name)
+    resource = get_resource_by_name(datapackage, resource_name)
+    # Dates are stored as datetime64, but served as dates
+    cls.__date_columns__ = [to_underscore(field.get('name'))
+                            for field in resource.schema.get('fields', [])
+                            if field.get('type') == 'date']
+    return cls
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import itertools
+import operator
+import time
+
 import sqlalchemy
 import sqlalchemy.orm
 from datapackage import DataPackage
@@ -7,7 +11,11 @@ from datapackage import DataPackage
 from .backend import Backend as BaseBackend
 from ..queryset import QuerySet as BaseQuerySet
 from ..model import mapper as basemapper
-from ...utils import to_camelcase, to_underscore, get_resource_by_name
+from ..planner import arity_bucket, plan
+from ...cache import LRUCache
+from ...profiling import profiler
+from ...utils import to_camelcase, to_underscore, get_resource_by_name, chunks
+from ...utils import row_hash
 from ...utils import get_type as get_column_type
 
 
@@ -18,6 +26,34 @@ __all__ = ['populate', 'mapper', 'Base', 'QuerySet', 'Backend']
 # Default SQLALchemy metadata object
 metadata_ = sqlalchemy.MetaData()
 
+# Number of rows inserted per transaction when populating a table
+DEFAULT_BATCH_SIZE = 10000
+
+# Table used to store the data version of each table
+VERSIONS_TABLENAME = '_data_versions'
+
+# Table used to store the number of distinct values of each column
+STATS_TABLENAME = '_column_stats'
+
+# Seconds the column statistics are kept before they are read again
+STATS_MAX_AGE = 60
+
+# Number of compiled statements kept by each backend
+DEFAULT_STATEMENT_CACHE_SIZE = 256
+
+# Databases sorting the NULLs after the other values in ascending order.
+# The keyset pagination needs them first, like SQLite and MySQL do.
+NULLS_LAST_DIALECTS = ('postgresql', 'oracle')
+
+# Filter operators
+OPERATORS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le
+}
+
 
 class BaseMeta(type):
     def __new__(mcls, name, bases, attrs):
@@ -28,7 +64,8 @@ class BaseMeta(type):
                 datapackage = DataPackage(unicode(datapackage))
             resource_name = unicode(attrs.get('__resource__'))
             metadata = attrs.get('__metadata__', metadata_)
-            mapper(cls, datapackage, resource_name, metadata)
+            index_fields = attrs.get('__index_fields__', True)
+            mapper(cls, datapackage, resource_name, metadata, index_fields)
             cls.__queryset__ = SQLAlchemyQuerySet
         return cls
 
@@ -91,58 +128,474 @@ class SQLAlchemyBackend(BaseBackend):
 
     base_class = Base
 
-    def __init__(self, session, metadata=None):
+    def __init__(self, session, metadata=None, index_fields=True,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE):
         if metadata is None:
             metadata = sqlalchemy.MetaData()
         self.session = session
         self.metadata = metadata
+        # Create an index for each field, since every field is a filter
+        self.index_fields = index_fields
+        # Compiled statements of the querysets, by shape
+        self.statements = LRUCache(statement_cache_size, 0)
+        self.stats_table = _get_stats_table(metadata)
+        self._column_stats = {}
+        self.versions_table = _get_versions_table(metadata)
+        self._versions_table_created = False
 
     @property
     def default_attrs(self):
-        return {'__metadata__': self.metadata}
-
-    def populate(self, model):
-        populate(model, self.session)
+        return {'__metadata__': self.metadata,
+                '__index_fields__': self.index_fields}
+
+    def populate(self, model, batch_size=None, data=None):
+        total = populate(model, self.session, batch_size, data)
+        self.analyze(model)
+        return total
+
+    def update(self, model, batch_size=None, data=None):
+        total = update(model, self.session, batch_size, data)
+        self.analyze(model)
+        return total
+
+    def _get_versions_engine(self):
+        engine = self.session.get_bind(mapper=None)
+        if not self._versions_table_created:
+            self.versions_table.create(engine, checkfirst=True)
+            self.stats_table.create(engine, checkfirst=True)
+            self._versions_table_created = True
+        return engine
+
+    def analyze(self, model):
+        """Count the distinct values of each column of `model`, for the
+        query planner, and update the statistics of the database.
+        """
+        table = self.stats_table
+        engine = self._get_versions_engine()
+        stats = analyze(model.__table__, engine)
+        with engine.begin() as connection:
+            connection.execute(
+                table.delete().where(table.c.tablename == model.__tablename__))
+            connection.execute(table.insert(), [
+                {'tablename': model.__tablename__, 'column_name': column_name,
+                 'cardinality': cardinality}
+                for column_name, cardinality in stats.items()])
+        self._column_stats[model.__tablename__] = (time.time(), stats)
+        return stats
+
+    def get_column_stats(self, model):
+        checked, stats = self._column_stats.get(model.__tablename__,
+                                                (0, None))
+        if stats is None or time.time() - checked > STATS_MAX_AGE:
+            table = self.stats_table
+            engine = self._get_versions_engine()
+            rows = engine.execute(
+                sqlalchemy.select([table.c.column_name, table.c.cardinality])
+                .where(table.c.tablename == model.__tablename__))
+            stats = dict(rows.fetchall())
+            self._column_stats[model.__tablename__] = (time.time(), stats)
+        return stats
+
+    def get_data_version(self, model):
+        table = self.versions_table
+        engine = self._get_versions_engine()
+        version = engine.execute(
+            sqlalchemy.select([table.c.version])
+            .where(table.c.tablename == model.__tablename__)).scalar()
+        return version or 0
+
+    def get_fingerprint(self, model):
+        table = self.versions_table
+        engine = self._get_versions_engine()
+        return engine.execute(
+            sqlalchemy.select([table.c.fingerprint])
+            .where(table.c.tablename == model.__tablename__)).scalar()
+
+    def bump_data_version(self, model, fingerprint=None):
+        table = self.versions_table
+        engine = self._get_versions_engine()
+        # Use the current time as version, instead of a counter, so versions
+        # don't repeat when the versions table is dropped by `initdb`
+        version = int(time.time() * 1000)
+        with engine.begin() as connection:
+            updated = connection.execute(
+                table.update()
+                .where(table.c.tablename == model.__tablename__)
+                .values(version=version, fingerprint=fingerprint)).rowcount
+            if not updated:
+                connection.execute(table.insert(),
+                                   tablename=model.__tablename__,
+                                   version=version, fingerprint=fingerprint)
+        return version
 
 Backend = SQLAlchemyBackend
 
 
 class SQLAlchemyQuerySet(BaseQuerySet):
-    def __init__(self, model, backend, sqla_query=None):
-        if sqla_query is None:
-            sqla_query = backend.session.query(model)
+    """Queryset which records the filters, instead of building an ORM query
+    at each step. The SQL statement of each shape of query (the filtered
+    columns, the sizes of the `IN` lists, the order, the projection...) is
+    compiled once and kept in the backend `statements` cache, so the
+    requests only bind their values.
+    """
+
+    def __init__(self, model, backend, criteria=(), parameters=(),
+                 order=(), offset=None, limit=None, columns=None,
+                 index=None):
         super(SQLAlchemyQuerySet, self).__init__(model, backend)
-        self._sqla_query = sqla_query
+        # Tuples of `(operator, column name, number of values)`
+        self._criteria = criteria
+        self._parameters = parameters
+        self._order = order
+        self._offset = offset
+        self._limit = limit
+        self._columns = columns
+        # Name of the index chosen by `where`
+        self._index = index
+
+    def _clone(self, **kwargs):
+        attrs = {
+            'criteria': self._criteria,
+            'parameters': self._parameters,
+            'order': self._order,
+            'offset': self._offset,
+            'limit': self._limit,
+            'columns': self._columns,
+            'index': self._index
+        }
+        attrs.update(kwargs)
+        return SQLAlchemyQuerySet(self.model, self.backend, **attrs)
+
+    def _and(self, operator_, column_name, values):
+        values = tuple(values)
+        return self._clone(
+            criteria=self._criteria + ((operator_, column_name, len(values)), ),
+            parameters=self._parameters + values)
 
     def get(self, key):
-        return self._sqla_query.get(key)
+        sqla_query = self.backend.session.query(self.model)
+        if self._columns is not None:
+            sqla_query = sqla_query.options(
+                sqlalchemy.orm.load_only(*self._columns))
+        # The SQL statement and the ORM objects creation
+        with profiler.phase('orm'):
+            return sqla_query.get(key)
 
     def filter(self, *args, **kwargs):
-        sqla_query = self._sqla_query.filter_by(**kwargs)
-        return SQLAlchemyQuerySet(self.model, self.backend, sqla_query)
+        queryset = self
+        for column_name, value in kwargs.items():
+            queryset = queryset._and('eq', column_name, [value])
+        return queryset
 
     def in_(self, *args, **kwargs):
-        sqla_query = self._sqla_query
+        queryset = self
         for column_name, values in kwargs.items():
-            column = getattr(self.model, column_name)
-            sqla_query = self._sqla_query.filter(getattr(column, 'in_')(values))
-        return SQLAlchemyQuerySet(self.model, self.backend, sqla_query)
+            values = list(values)
+            if values:
+                # Repeat the last value up to the size of the bucket
+                size = arity_bucket(len(values))
+                values += values[-1:] * (size - len(values))
+            queryset = queryset._and('in', column_name, values)
+        return queryset
+
+    def _compare(self, operator_, kwargs):
+        queryset = self
+        for column_name, value in kwargs.items():
+            queryset = queryset._and(operator_, column_name, [value])
+        return queryset
+
+    def where(self, predicates):
+        # The most selective predicates first, starting with the columns of
+        # the index which serves them
+        stats = self.backend.get_column_stats(self.model)
+        predicates, index = plan(predicates, stats,
+                                 _get_indexes(self.model.__table__))
+        queryset = super(SQLAlchemyQuerySet, self).where(predicates)
+        return queryset._clone(index=index)
+
+    def gt(self, **kwargs):
+        return self._compare('gt', kwargs)
+
+    def gte(self, **kwargs):
+        return self._compare('gte', kwargs)
+
+    def lt(self, **kwargs):
+        return self._compare('lt', kwargs)
+
+    def lte(self, **kwargs):
+        return self._compare('lte', kwargs)
 
     def limit(self, value):
-        sqla_query = self._sqla_query.limit(value)
-        return SQLAlchemyQuerySet(self.model, self.backend, sqla_query)
+        return self._clone(limit=value)
 
     def offset(self, value):
-        sqla_query = self._sqla_query.offset(value)
-        return SQLAlchemyQuerySet(self.model, self.backend, sqla_query)
+        return self._clone(offset=value)
+
+    def only(self, *column_names):
+        # The primary key is always loaded, like the ORM does
+        columns = tuple(column.name for column in self.model.__table__.columns
+                        if column.name in column_names or column.primary_key)
+        return self._clone(columns=columns)
+
+    def seek(self, column_names, values=None):
+        queryset = self._clone(order=tuple(column_names))
+        if values is None:
+            return queryset
+        # The NULLs are compared with `IS NULL`, so which values are NULL is
+        # part of the statement, instead of the parameters
+        nulls = tuple(value is None for value in values)
+        return queryset._clone(
+            criteria=self._criteria + (('seek', tuple(column_names), nulls), ),
+            parameters=self._parameters + tuple(value for value in values
+                                                if value is not None))
+
+    def _where(self):
+        """Return the conditions of the filters, with a bound parameter
+        (`p0`, `p1`...) for each value.
+        """
+        table = self.model.__table__
+        names = ('p{}'.format(i) for i in itertools.count())
+        clauses = []
+        for operator_, column_name, arity in self._criteria:
+            if operator_ == 'seek':
+                # The column names and the NULL values of the seek
+                clauses.append(_seek_clause(table, column_name, arity, names))
+                continue
+            column = table.c[column_name]
+            parameters = [sqlalchemy.bindparam(next(names), type_=column.type)
+                          for _ in xrange(arity)]
+            if operator_ == 'in':
+                clauses.append(column.in_(parameters) if parameters
+                               else sqlalchemy.false())
+            else:
+                clauses.append(OPERATORS[operator_](column, parameters[0]))
+        return clauses
+
+    def _order_by(self, dialect):
+        # The NULLs are the smallest values, like `_seek_clause` compares them
+        nulls_last = dialect.name in NULLS_LAST_DIALECTS
+        table = self.model.__table__
+        order_by = []
+        for column_name in self._order:
+            if column_name.startswith('-'):
+                clause = table.c[column_name[1:]].desc()
+                if nulls_last:
+                    clause = clause.nullslast()
+            else:
+                clause = table.c[column_name].asc()
+                if nulls_last:
+                    clause = clause.nullsfirst()
+            order_by.append(clause)
+        return order_by
+
+    def _select(self, columns, dialect):
+        statement = sqlalchemy.select(columns)
+        if self._index is not None:
+            # Only MySQL takes index hints; the other databases choose it
+            # with the statistics updated by `analyze`
+            statement = statement.with_hint(
+                self.model.__table__, 'USE INDEX ({})'.format(self._index),
+                'mysql')
+        for clause in self._where():
+            statement = statement.where(clause)
+        statement = statement.order_by(*self._order_by(dialect))
+        if self._offset is not None:
+            statement = statement.offset(
+                sqlalchemy.bindparam('offset', type_=sqlalchemy.Integer))
+        if self._limit is not None:
+            statement = statement.limit(
+                sqlalchemy.bindparam('limit', type_=sqlalchemy.Integer))
+        return statement
+
+    def _statement(self, kind, dialect):
+        table = self.model.__table__
+        if self._columns is None:
+            columns = list(table.columns)
+        else:
+            columns = [table.c[column_name] for column_name in self._columns]
+        if kind == 'count':
+            statement = sqlalchemy.select([sqlalchemy.func.count(table.c._uid)])
+            for clause in self._where():
+                statement = statement.where(clause)
+            return statement
+        if kind == 'batches':
+            # Read the numbers as floats, instead of creating `Decimal`s
+            columns = [
+                sqlalchemy.type_coerce(column, sqlalchemy.types.Float).label(
+                    column.name)
+                if isinstance(column.type, sqlalchemy.types.Numeric) and
+                not isinstance(column.type, sqlalchemy.types.Float) else column
+                for column in columns]
+        statement = self._select(columns, dialect)
+        if kind in ('iterate', 'batches'):
+            # Ask for a server side cursor, where the database supports it
+            statement = statement.execution_options(stream_results=True)
+        return statement
+
+    def _execute(self, kind):
+        mapper = sqlalchemy.orm.class_mapper(self.model)
+        connection = self.backend.session.connection(mapper=mapper)
+        if kind == 'count':
+            # Counts ignore the order and the pagination
+            key = (self.model, kind, self._criteria)
+        else:
+            key = (self.model, kind, self._criteria, self._order,
+                   self._offset is not None, self._limit is not None,
+                   self._columns, self._index)
+        key += (connection.dialect.name, )
+        compiled = self.backend.statements.get(key)
+        if compiled is None:
+            compiled = self._statement(kind, connection.dialect).compile(
+                dialect=connection.dialect)
+            self.backend.statements.set(key, compiled)
+
+        parameters = {'p{}'.format(i): value
+                      for i, value in enumerate(self._parameters)}
+        if self._offset is not None:
+            parameters['offset'] = self._offset
+        if self._limit is not None:
+            parameters['limit'] = self._limit
+        return connection.execute(compiled, parameters)
+
+    def _sqla_query(self):
+        """Return the ORM query of the filters, for the ORM objects."""
+        sqla_query = self.backend.session.query(self.model)
+        for clause in self._where():
+            sqla_query = sqla_query.filter(clause)
+        dialect = self.backend.session.get_bind(
+            mapper=sqlalchemy.orm.class_mapper(self.model)).dialect
+        sqla_query = sqla_query.order_by(*self._order_by(dialect))
+        sqla_query = sqla_query.offset(self._offset).limit(self._limit)
+        if self._columns is not None:
+            sqla_query = sqla_query.options(
+                sqlalchemy.orm.load_only(*self._columns))
+        return sqla_query.params({'p{}'.format(i): value
+                                  for i, value in enumerate(self._parameters)})
 
     def all(self):
-        return self._sqla_query.all()
+        with profiler.phase('orm'):
+            return self._sqla_query().all()
+
+    def values(self):
+        # Skip the identity map and the attributes instrumentation
+        return self._execute('values').fetchall()
+
+    def iterate(self, batch_size=1000):
+        result = self._execute('iterate')
+        try:
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            result.close()
+
+    def batches(self, batch_size=10000):
+        result = self._execute('batches')
+        try:
+            keys = result.keys()
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield dict(zip(keys, zip(*rows)))
+        finally:
+            result.close()
+
+    def aggregate(self, group_by, **aggregates):
+        group_columns = [getattr(self.model, column_name)
+                         for column_name in group_by]
+        entities = list(group_columns)
+        for label, (function, column_name) in aggregates.items():
+            if column_name is None:
+                # Count a column, so the query has a FROM clause even
+                # without filters or groups
+                expression = sqlalchemy.func.count(self.model._uid)
+            else:
+                column = getattr(self.model, column_name)
+                expression = getattr(sqlalchemy.func, function)(column)
+            entities.append(expression.label(label))
+        sqla_query = self._sqla_query().with_entities(*entities)
+        if group_columns:
+            sqla_query = sqla_query.group_by(*group_columns)
+            sqla_query = sqla_query.order_by(*group_columns)
+        return sqla_query.all()
+
+    def count(self):
+        # Unlike `Query.count`, don't wrap the query in a subquery
+        return self._execute('count').scalar()
+
+
+def _seek_clause(table, column_names, nulls, names):
+    # (a, b) > (x, y) is written as `a > x OR (a = x AND b > y)`, since not
+    # every database supports row values comparison. The NULLs are the
+    # smallest values, so they are before `x` in ascending order and after
+    # it in descending order.
+    equals = []
+    clauses = []
+    for column_name, null in zip(column_names, nulls):
+        descending = column_name.startswith('-')
+        column = table.c[column_name.lstrip('-')]
+        if null:
+            # Only the values of a descending column are after NULL
+            if not descending:
+                clauses.append(sqlalchemy.and_(*(equals +
+                                                 [column.isnot(None)])))
+            equals.append(column.is_(None))
+            continue
+        parameter = sqlalchemy.bindparam(next(names), type_=column.type)
+        if descending:
+            compare = column < parameter
+            if column.nullable:
+                compare = sqlalchemy.or_(compare, column.is_(None))
+        else:
+            compare = column > parameter
+        clauses.append(sqlalchemy.and_(*(equals + [compare])))
+        equals.append(column == parameter)
+    return sqlalchemy.or_(*clauses) if clauses else sqlalchemy.false()
 
 QuerySet = SQLAlchemyQuerySet
 
 
-def _create_sqla_table(resource, metadata, tablename):
+def _get_versions_table(metadata):
+    if VERSIONS_TABLENAME in metadata.tables:
+        return metadata.tables[VERSIONS_TABLENAME]
+    return sqlalchemy.Table(
+        VERSIONS_TABLENAME, metadata,
+        sqlalchemy.Column('tablename', sqlalchemy.types.String(255),
+                          primary_key=True),
+        sqlalchemy.Column('version', sqlalchemy.types.BigInteger,
+                          nullable=False),
+        # Hash of the imported data
+        sqlalchemy.Column('fingerprint', sqlalchemy.types.String(40)))
+
+
+def _get_stats_table(metadata):
+    if STATS_TABLENAME in metadata.tables:
+        return metadata.tables[STATS_TABLENAME]
+    return sqlalchemy.Table(
+        STATS_TABLENAME, metadata,
+        sqlalchemy.Column('tablename', sqlalchemy.types.String(255),
+                          primary_key=True),
+        sqlalchemy.Column('column_name', sqlalchemy.types.String(255),
+                          primary_key=True),
+        # Number of distinct values
+        sqlalchemy.Column('cardinality', sqlalchemy.types.BigInteger,
+                          nullable=False))
+
+
+def _get_indexes(table):
+    """Return the column names of each index of `table`, by index name."""
+    indexes = {index.name: tuple(column.name for column in index.columns)
+               for index in table.indexes}
+    indexes['PRIMARY'] = tuple(column.name
+                               for column in table.primary_key.columns)
+    return indexes
+
+
+def _create_sqla_table(resource, metadata, tablename, index_fields=True):
     schema = resource.schema
 
     columns = [
@@ -151,38 +604,200 @@ def _create_sqla_table(resource, metadata, tablename):
         sqlalchemy.Column('_uid',  # Internal id
                           sqlalchemy.types.Integer,
                           primary_key=True,
-                          autoincrement=True)
+                          autoincrement=True),
+        # Hash of the row values, used to find the changed rows
+        sqlalchemy.Column('_hash', sqlalchemy.types.String(40))
     ]
     # Iterate through fields to create a column to each one
     for field in schema.get('fields', []):
         column_type = get_column_type(SQLAlchemyBackend.TYPES, field)
         column_name = to_underscore(field.get('name'))
         # TODO: Check if the field is a primary key or a foreign key
-        column = sqlalchemy.Column(column_name, column_type)
+        # Every field is a filter in the API, so index it unless the
+        # field explicitly says otherwise (`"index": false`)
+        index = index_fields and field.get('index', True)
+        column = sqlalchemy.Column(column_name, column_type, index=index)
         columns.append(column)
 
-    return sqlalchemy.Table(tablename, metadata, *columns)
-
-
-def populate(model, session):
+    table = sqlalchemy.Table(tablename, metadata, *columns)
+
+    # Composite indexes hinted in the schema, e.g.:
+    #   "indexes": [["countryCode", "year"]]
+    indexed = set(tuple(column.name for column in index.columns)
+                  for index in table.indexes)
+    for field_names in schema.get('indexes', []):
+        column_names = tuple(to_underscore(name) for name in field_names)
+        unknown = [name for name, column_name in zip(field_names, column_names)
+                   if column_name not in table.c]
+        if not column_names:
+            raise ValueError('Empty index in the schema of resource '
+                             '{}'.format(resource.name))
+        if unknown:
+            raise ValueError('Index {!r} of resource {} has unknown fields: '
+                             '{}'.format(field_names, resource.name,
+                                         ', '.join(unknown)))
+        # Already created, e.g. the index of every field
+        if column_names in indexed:
+            continue
+        indexed.add(column_names)
+        index_name = 'ix_{}_{}'.format(tablename, '_'.join(column_names))
+        sqlalchemy.Index(index_name, *[table.c[name] for name in column_names])
+
+    return table
+
+
+def _drop_indexes(table, engine):
+    inspector = sqlalchemy.inspect(engine)
+    existing = set(index['name'] for index in
+                   inspector.get_indexes(table.name, schema=table.schema))
+    for index in table.indexes:
+        if index.name in existing:
+            index.drop(engine)
+
+
+def _create_indexes(table, engine):
+    start = time.time()
+    for index in table.indexes:
+        index.create(engine)
+    if table.indexes:
+        print '---> {}: {} indexes in {:.2f}s'.format(
+            table.name, len(table.indexes), time.time() - start)
+
+
+def analyze(table, engine):
+    """Return the number of distinct values of each column of `table`,
+    counted with a single scan, and update the statistics the database uses
+    to choose the indexes.
+    """
+    columns = [column for column in table.columns if column.name != '_hash']
+    counts = engine.execute(sqlalchemy.select(
+        [sqlalchemy.func.count(sqlalchemy.distinct(column))
+         for column in columns])).fetchone()
+    if engine.dialect.name in ('sqlite', 'postgresql'):
+        engine.execute('ANALYZE {}'.format(
+            engine.dialect.identifier_preparer.format_table(table)))
+    return {column.name: count for column, count in zip(columns, counts)}
+
+
+def _prepare_rows(data):
+    """Convert the Data Package rows to columns values, with the `_hash`."""
+    # Cache the column names, so we don't normalize every key of every row
+    column_names = {}
+    for item in data:
+        row = {}
+        for key, val in item.iteritems():
+            column_name = column_names.get(key)
+            if column_name is None:
+                column_name = column_names[key] = to_underscore(key)
+            row[column_name] = val
+        row['_hash'] = row_hash(row)
+        yield row
+
+
+def populate(model, session, batch_size=None, data=None):
+    if batch_size is None:
+        batch_size = DEFAULT_BATCH_SIZE
     engine = session.get_bind(mapper=None)
     table = getattr(model, '__table__')
     # TODO: Raise an exception if there is no table defined
     # Make sure the table is created before inserting data
     table.create(engine, checkfirst=True)
-    # Get references inserted by `mapper`
-    datapackage = getattr(model, '__datapackage_instance__')
-    resource = getattr(model, '__resource_instance__')
-    # TODO: Raise an exception if there is no datapackage defined
-    data = datapackage.get_data(resource)
-    # Using SQLAlchemy Core insert method for performance reason.
-    # See: http://docs.sqlalchemy.org/en/rel_1_0/faq/performance.html
-    engine.execute(model.__table__.insert(),
-                   [{to_underscore(key): val for key, val in item.iteritems()}
-                    for item in data])
-
-
-def mapper(cls, datapackage, resource_name, metadata=None):
+    # Loading data into indexed tables is slow, so the indexes are dropped
+    # and built again after the data is inserted
+    _drop_indexes(table, engine)
+    if data is None:
+        # Get references inserted by `mapper`
+        datapackage = getattr(model, '__datapackage_instance__')
+        resource = getattr(model, '__resource_instance__')
+        # TODO: Raise an exception if there is no datapackage defined
+        data = datapackage.get_data(resource)
+    total = 0
+    start = time.time()
+    for rows in chunks(_prepare_rows(data), batch_size):
+        # Using SQLAlchemy Core insert method for performance reason.
+        # See: http://docs.sqlalchemy.org/en/rel_1_0/faq/performance.html
+        # Each batch has its own transaction, so memory usage and locks
+        # don't grow with the size of the resource.
+        with engine.begin() as connection:
+            connection.execute(table.insert(), rows)
+        total += len(rows)
+    elapsed = time.time() - start
+    print '---> {}: {} rows in {:.2f}s ({:.0f} rows/s)'.format(
+        table.name, total, elapsed, total / elapsed if elapsed else total)
+    _create_indexes(table, engine)
+    return total
+
+
+def update(model, session, batch_size=None, data=None):
+    if batch_size is None:
+        batch_size = DEFAULT_BATCH_SIZE
+    engine = session.get_bind(mapper=None)
+    table = getattr(model, '__table__')
+    table.create(engine, checkfirst=True)
+    if data is None:
+        datapackage = getattr(model, '__datapackage_instance__')
+        resource = getattr(model, '__resource_instance__')
+        data = datapackage.get_data(resource)
+    key_columns = getattr(model, '__primary_key__', None)
+    start = time.time()
+
+    # Find the current rows by primary key or, if there is none, by hash.
+    # Only the ids and hashes are kept in memory.
+    existing = {}
+    columns = [table.c._uid, table.c._hash]
+    columns += [table.c[column_name] for column_name in key_columns or []]
+    for row in engine.execute(sqlalchemy.select(columns)):
+        if key_columns:
+            key = tuple(row[column_name] for column_name in key_columns)
+            existing[key] = (row['_uid'], row['_hash'])
+        else:
+            existing.setdefault(row['_hash'], []).append(row['_uid'])
+
+    update_statement = table.update().where(
+        table.c._uid == sqlalchemy.bindparam('_uid_'))
+    inserted = updated = 0
+    for rows in chunks(_prepare_rows(data), batch_size):
+        inserts = []
+        updates = []
+        for row in rows:
+            if key_columns:
+                key = tuple(row[column_name] for column_name in key_columns)
+                uid, hash_ = existing.pop(key, (None, None))
+                if uid is None:
+                    inserts.append(row)
+                elif hash_ != row['_hash']:
+                    row['_uid_'] = uid
+                    updates.append(row)
+            else:
+                uids = existing.get(row['_hash'])
+                if uids:
+                    # Same values, so the row is kept
+                    uids.pop()
+                else:
+                    inserts.append(row)
+        with engine.begin() as connection:
+            if inserts:
+                connection.execute(table.insert(), inserts)
+            if updates:
+                connection.execute(update_statement, updates)
+        inserted += len(inserts)
+        updated += len(updates)
+
+    # Delete the rows that are not in the data anymore
+    if key_columns:
+        uids = [uid for uid, _ in existing.itervalues()]
+    else:
+        uids = [uid for uids in existing.itervalues() for uid in uids]
+    for chunk in chunks(uids, batch_size):
+        with engine.begin() as connection:
+            connection.execute(table.delete().where(table.c._uid.in_(chunk)))
+
+    print '---> {}: {} inserted, {} updated, {} deleted in {:.2f}s'.format(
+        table.name, inserted, updated, len(uids), time.time() - start)
+    return inserted + updated + len(uids)
+
+
+def mapper(cls, datapackage, resource_name, metadata=None, index_fields=True):
     if metadata is None:
         metadata = metadata_
     cls = basemapper(cls, datapackage, resource_name)
@@ -192,7 +807,8 @@ def mapper(cls, datapackage, resource_name, metadata=None):
         prefix = getattr(cls, '__prefix__', datapackage.name)
         tablename = '_'.join([prefix, resource_name])
         cls.__tablename__ = to_underscore(tablename)
-    table = _create_sqla_table(resource, metadata, cls.__tablename__)
+    table = _create_sqla_table(resource, metadata, cls.__tablename__,
+                               index_fields)
     cls.__table__ = table
     # Associate SQLAlchemy table with the class
     sqlalchemy.orm.mapper(cls, table)
@@ -1,11 +1,104 @@
 # -*- coding: utf-8 -*-
 
+import cPickle as pickle
+import hashlib
 import inspect
+import multiprocessing
+import tempfile
+import time
+import traceback
 
-from ..utils import to_camelcase, to_underscore
+from datapackage import DataPackage
+
+from ..utils import to_camelcase, to_underscore, get_resource_by_name, chunks
+from ..utils import row_hash
 from .queryset import QuerySet
 
 
+# Number of rows sent at a time by the import worker processes
+TRANSFER_BATCH_SIZE = 1000
+# Max number of batches waiting to be inserted, for each resource
+TRANSFER_QUEUE_SIZE = 10
+
+# State of the import worker processes, inherited from the parent process
+# (the queues can't be pickled, so this relies on `fork`)
+_worker_datapackage = None
+_worker_queues = None
+
+
+def _init_worker(datapackage, queues):
+    global _worker_datapackage, _worker_queues
+    _worker_datapackage = datapackage
+    _worker_queues = queues
+
+
+def _read_resource(resource_name):
+    """Read and parse the data of a resource in a worker process, sending
+    it to the parent process in batches.
+    """
+    queue = _worker_queues[resource_name]
+    try:
+        resource = get_resource_by_name(_worker_datapackage, resource_name)
+        data = _worker_datapackage.get_data(resource)
+        for batch in chunks(data, TRANSFER_BATCH_SIZE):
+            queue.put(('rows', batch))
+        queue.put(('done', None))
+    except Exception:
+        queue.put(('error', traceback.format_exc()))
+
+
+def _iter_queue(queue):
+    while True:
+        message, value = queue.get()
+        if message == 'done':
+            return
+        elif message == 'error':
+            raise RuntimeError(value)
+        for row in value:
+            yield row
+
+
+class _Fingerprint(object):
+    """Hash the rows of `data` while they are iterated."""
+
+    def __init__(self, data):
+        self.data = data
+        self.hash = hashlib.sha1()
+
+    def __iter__(self):
+        for row in self.data:
+            self.hash.update(row_hash(row))
+            yield row
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def _spool(data, batch_size=TRANSFER_BATCH_SIZE):
+    """Save `data` to a temporary file, returning the file and the
+    fingerprint of the data.
+    """
+    fingerprint = _Fingerprint(data)
+    spool = tempfile.TemporaryFile()
+    for batch in chunks(fingerprint, batch_size):
+        pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+    spool.seek(0)
+    return spool, fingerprint.hexdigest()
+
+
+def _iter_spool(spool):
+    try:
+        while True:
+            try:
+                batch = pickle.load(spool)
+            except EOFError:
+                return
+            for row in batch:
+                yield row
+    finally:
+        spool.close()
+
+
 def mapper(cls, datapackage, resource_name):
     resource = next((r for r in datapackage.resources
                      if r.name == resource_name))
@@ -13,6 +106,11 @@ def mapper(cls, datapackage, resource_name):
     cls.__datapackage_instance__ = datapackage
     cls.__resource__ = resource.name
     cls.__resource_instance__ = resource
+    # Columns of the primary key, if the schema has one
+    primary_key = resource.schema.get('primaryKey') or []
+    if isinstance(primary_key, basestring):
+        primary_key = [primary_key]
+    cls.__primary_key__ = [to_underscore(name) for name in primary_key]
     return cls
 
 
@@ -32,30 +130,108 @@ class ModelsMaker(object):
 
     @property
     def models(self):
-        if not self._models:
-            self.create_models()
-        return self._models.values()
+        return self.create_models().values()
 
     def get_model(self, name):
-        if not self._models:
-            self.create_models()
-        return self._models[name]
+        """Return the model of the resource `name`, creating it (but not the
+        other models) on the first call.
+        """
+        model = self._models.get(name)
+        if model is None:
+            try:
+                resource = get_resource_by_name(self.datapackage, name)
+            except StopIteration:
+                raise KeyError(name)
+            model = self._models[name] = self._create_model(resource)
+        return model
 
     def create_models(self):
-        self._models = {}
+        """Create the models that weren't created yet."""
         for resource in self.datapackage.resources:
-            cls = self._create_class(resource)
-            queryset_class = getattr(cls, '__queryset__')
-            if queryset_class:
-                cls.queryset = queryset_class(cls, self.backend)
-            self._models[resource.name] = cls
+            self.get_model(resource.name)
         return self._models
 
-    def populate(self, models=None):
+    def _create_model(self, resource):
+        cls = self._create_class(resource)
+        queryset_class = getattr(cls, '__queryset__')
+        if queryset_class:
+            cls.queryset = queryset_class(cls, self.backend)
+        return cls
+
+    def populate(self, models=None, batch_size=None, workers=None,
+                 incremental=False):
+        """Import the data of `models` (all by default).
+
+        With more than one worker, the resources are read and parsed by a
+        pool of `workers` processes, while this process inserts them.
+
+        If `incremental` is true, resources whose data has the same
+        fingerprint of the last import are skipped, and the others are
+        updated with only the rows that changed.
+        """
         if models is None:
             models = self.models
-        for model in models:
-            self.backend.populate(model)
+        models = list(models)
+        timings = []
+        pool = None
+        if (workers > 1 and len(models) > 1 and
+                not self.backend.reads_resources):
+            queues = {model.__resource__: multiprocessing.Queue(
+                      TRANSFER_QUEUE_SIZE) for model in models}
+            pool = multiprocessing.Pool(workers, _init_worker,
+                                        (self.datapackage, queues))
+            for model in models:
+                pool.apply_async(_read_resource, (model.__resource__, ))
+            pool.close()
+        try:
+            for model in models:
+                start = time.time()
+                if self.backend.reads_resources and not incremental:
+                    total = self.backend.populate(model,
+                                                  batch_size=batch_size)
+                    # Unknown, so the next incremental import is an update
+                    self.backend.bump_data_version(model, None)
+                    timings.append((model.__resource__, total,
+                                    time.time() - start))
+                    continue
+                if pool is not None:
+                    data = _iter_queue(queues[model.__resource__])
+                else:
+                    resource = model.__resource_instance__
+                    data = self.datapackage.get_data(resource)
+                if incremental:
+                    spool, fingerprint = _spool(data)
+                    if fingerprint == self.backend.get_fingerprint(model):
+                        spool.close()
+                        print '---> {}: unchanged'.format(model.__resource__)
+                        timings.append((model.__resource__, 0,
+                                        time.time() - start))
+                        continue
+                    total = self.backend.update(model, batch_size=batch_size,
+                                                data=_iter_spool(spool))
+                else:
+                    data = _Fingerprint(data)
+                    total = self.backend.populate(model,
+                                                  batch_size=batch_size,
+                                                  data=data)
+                    fingerprint = data.hexdigest()
+                # Invalidate the cached responses
+                self.backend.bump_data_version(model, fingerprint)
+                timings.append((model.__resource__, total,
+                                time.time() - start))
+        except:
+            if pool is not None:
+                pool.terminate()
+            raise
+        if pool is not None:
+            pool.join()
+
+        print '---> Summary'
+        for resource_name, total, elapsed in timings:
+            print '     {}: {} rows in {:.2f}s ({:.0f} rows/s)'.format(
+                resource_name, total or 0, elapsed,
+                (total or 0) / elapsed if elapsed else 0)
+        return timings
 
     def _create_class(self, resource):
         classname = to_camelcase(resource.name)
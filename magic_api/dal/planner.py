@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Order the filters of a query by their selectivity, estimated from the
+number of distinct values of each column, and pick the index serving them.
+"""
+
+# For import *
+__all__ = ['arity_bucket', 'plan', 'selectivity', 'served_predicates']
+
+
+# Operators which select single values, and can use all the columns of an
+# index. A comparison can only use the last one.
+EQUALITY_OPERATORS = ('eq', 'in')
+
+# Fraction of the rows assumed to match a comparison (`gt`, `lte`...)
+RANGE_SELECTIVITY = 1 / 3.0
+
+# Distinct values assumed for the columns without statistics
+DEFAULT_CARDINALITY = 10
+
+
+def arity_bucket(size):
+    """Round the size of an `IN` list up to a power of two, so a few
+    statements serve every size.
+    """
+    bucket = 1
+    while bucket < size:
+        bucket *= 2
+    return bucket
+
+
+def selectivity(predicate, stats):
+    """Estimate the fraction of the rows matching `predicate`, a tuple of
+    `(operator, column name, value)`, where the value of `in` is a list.
+
+    The sizes of the `IN` lists are rounded like the statements cache does,
+    so the queries of the same shape get the same plan.
+    """
+    operator_, column_name, value = predicate
+    if operator_ not in EQUALITY_OPERATORS:
+        return RANGE_SELECTIVITY
+    if operator_ == 'in' and not value:
+        return 0.0
+    size = arity_bucket(len(value)) if operator_ == 'in' else 1
+    cardinality = stats.get(column_name) or DEFAULT_CARDINALITY
+    return min(1.0, size / float(cardinality))
+
+
+def served_predicates(column_names, predicates):
+    """Return the predicates an index of `column_names` can serve: the ones
+    on a prefix of its columns, selecting single values, up to the first
+    column with comparisons.
+    """
+    served = []
+    for column_name in column_names:
+        on_column = [predicate for predicate in predicates
+                     if predicate[1] == column_name]
+        if not on_column:
+            break
+        served += on_column
+        if any(operator_ not in EQUALITY_OPERATORS
+               for operator_, _, _ in on_column):
+            break
+    return served
+
+
+def plan(predicates, stats=None, indexes=None):
+    """Return `(predicates, index_name)`: the predicates of the index which
+    selects the fewest rows, in the order of its columns, followed by the
+    others from the most to the least selective.
+
+    `stats` maps the column names to their number of distinct values, and
+    `indexes` maps the index names to their column names.
+    """
+    stats = stats or {}
+    ordered = sorted(predicates,
+                     key=lambda predicate: selectivity(predicate, stats))
+    best_name = None
+    best_served = []
+    best_estimate = 1.0
+    for index_name, column_names in sorted((indexes or {}).items()):
+        served = served_predicates(column_names, ordered)
+        estimate = 1.0
+        for predicate in served:
+            estimate *= selectivity(predicate, stats)
+        # Prefer the indexes serving more predicates, with the same estimate
+        if served and (estimate < best_estimate or
+                       (estimate == best_estimate and
+                        len(served) > len(best_served))):
+            best_name, best_served, best_estimate = (index_name, served,
+                                                     estimate)
+    rest = [predicate for predicate in ordered
+            if not any(predicate is served for served in best_served)]
+    return best_served + rest, best_name
@@ -1,5 +1,16 @@
 # -*- coding: utf-8 -*-
 
+class Row(dict):
+    """Read-only row, whose values can also be read as attributes."""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
 class QuerySet(object):
     def __init__(self, model, backend):
         self.model = model
@@ -14,11 +25,90 @@ class QuerySet(object):
     def in_(self, **kwargs):
         raise NotImplementedError()
 
+    # Comparison filters, e.g. `queryset.gte(year=date(2008, 1, 1))`
+
+    def gt(self, **kwargs):
+        raise NotImplementedError()
+
+    def gte(self, **kwargs):
+        raise NotImplementedError()
+
+    def lt(self, **kwargs):
+        raise NotImplementedError()
+
+    def lte(self, **kwargs):
+        raise NotImplementedError()
+
+    def where(self, predicates):
+        """AND all the `predicates`, tuples of `(operator, column name,
+        value)`, where the operator is `eq`, `in` (the value is a list),
+        `gt`, `gte`, `lt` or `lte`.
+
+        Backends may reorder them, since they are all applied.
+        """
+        queryset = self
+        for operator_, column_name, value in predicates:
+            if operator_ == 'eq':
+                queryset = queryset.filter(**{column_name: value})
+            elif operator_ == 'in':
+                queryset = queryset.in_(**{column_name: value})
+            else:
+                queryset = getattr(queryset, operator_)(**{column_name: value})
+        return queryset
+
     def limit(self, value):
         raise NotImplementedError()
 
     def offset(self, value):
         raise NotImplementedError()
 
+    def only(self, *column_names):
+        """Load only the given columns from the backend."""
+        raise NotImplementedError()
+
+    def seek(self, column_names, values=None):
+        """Order by `column_names` (prefixed with `-` for descending order)
+        and, if `values` is given, return only the rows after `values`.
+
+        This allows keyset pagination, which does not need to scan the
+        skipped rows like `offset` does. The NULLs are the smallest values,
+        first in ascending order and last in descending order.
+        """
+        raise NotImplementedError()
+
     def all(self):
         raise NotImplementedError()
+
+    def values(self):
+        """Return the rows as read-only mappings, without creating model
+        instances. Cheaper than `all` when the rows are only serialized.
+        """
+        raise NotImplementedError()
+
+    def iterate(self, batch_size=1000):
+        """Like `values`, but fetch the rows from the backend `batch_size`
+        rows at a time, while they are iterated.
+        """
+        raise NotImplementedError()
+
+    def batches(self, batch_size=10000):
+        """Yield the rows in columns, `batch_size` rows at a time: dicts of
+        column names to sequences of values (numbers are floats).
+        """
+        raise NotImplementedError()
+
+    def aggregate(self, group_by, **aggregates):
+        """Group the rows by the `group_by` columns and aggregate them.
+
+        Each keyword argument is a `(function, column_name)` tuple, where the
+        function is `count`, `sum`, `avg`, `min` or `max`, and the result
+        rows have a value named after the keyword. `column_name` can be
+        `None` for `count`, to count the rows.
+        """
+        raise NotImplementedError()
+
+    def count(self):
+        """Return the number of rows matching the filters, ignoring the
+        limit and offset.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import os
+import re
+import tempfile
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .cache import DataVersions
+from .utils import to_underscore
+from .utils import get_type as get_field_type
+
+# For import *
+__all__ = ['Exporter', 'FORMATS']
+
+
+# Mimetype and extension of the export formats
+FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+# Number of rows read from the backend at a time
+EXPORT_BATCH_SIZE = 65536
+
+# Map the data types between Data Package and Arrow
+if pyarrow is not None:
+    TYPES = {
+        'string': {
+            'default': pyarrow.string(),
+            'binary': pyarrow.binary()
+        },
+        'number': {
+            'default': pyarrow.float64()
+        },
+        'integer': {
+            'default': pyarrow.int64()
+        },
+        'boolean': {
+            'default': pyarrow.bool_()
+        },
+        'datetime': {
+            'default': pyarrow.timestamp('us')
+        },
+        'date': {
+            'default': pyarrow.date32()
+        },
+        'time': {
+            'default': pyarrow.time64('us')
+        }
+    }
+
+
+def _to_array(values, type_):
+    dtype = getattr(values, 'dtype', None)
+    if dtype is not None and dtype.kind == 'M':
+        # numpy datetimes, also used for dates
+        return pyarrow.array(values, from_pandas=True).cast(type_)
+    return pyarrow.array(values, type=type_, from_pandas=True)
+
+
+def arrow_schema(resource):
+    fields = [pyarrow.field('_uid', pyarrow.int64())]
+    for field in resource.schema.get('fields', []):
+        type_ = get_field_type(TYPES, field) or pyarrow.string()
+        fields.append(pyarrow.field(to_underscore(field.get('name')), type_))
+    return pyarrow.schema(fields)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+class Exporter(object):
+    """Export whole resources as Arrow IPC or Parquet files.
+
+    The files are kept in `path`, named after the data version of the
+    resource, so they are created once for each import, and the versions
+    before the previous one are removed. Like the Data Package cache, the
+    files are written to a temporary file and renamed, so the processes can
+    share them.
+    """
+
+    def __init__(self, path, version_check_interval=1):
+        if pyarrow is None:
+            raise RuntimeError('Exporter requires pyarrow')
+        self.path = path
+        self.versions = DataVersions(version_check_interval)
+        try:
+            os.makedirs(path)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+    def export(self, model, format_):
+        """Return the path of the export of `model` in `format_`."""
+        _, extension = FORMATS[format_]
+        prefix = '{}-{}-'.format(model.__prefix__, model.__resource__)
+        filename = '{}{}.{}'.format(prefix, self.versions.get(model),
+                                    extension)
+        path = os.path.join(self.path, filename)
+        if os.path.exists(path):
+            return path
+
+        temp = tempfile.NamedTemporaryFile(dir=self.path, delete=False)
+        try:
+            self._write(model, format_, temp)
+            temp.close()
+            os.rename(temp.name, path)
+        except:
+            temp.close()
+            os.unlink(temp.name)
+            raise
+
+        self._remove_old_versions(prefix, extension, filename)
+        return path
+
+    def _remove_old_versions(self, prefix, extension, filename):
+        # The other processes may still be sending the export of the
+        # previous version, until they see the new one, so it is kept
+        pattern = re.compile(r'{}\d+\.{}$'.format(re.escape(prefix),
+                                                  re.escape(extension)))
+        paths = [os.path.join(self.path, name)
+                 for name in os.listdir(self.path)
+                 if pattern.match(name) and name != filename]
+        paths.sort(key=_mtime, reverse=True)
+        for path in paths[1:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _write(self, model, format_, file_):
+        schema = arrow_schema(model.__resource_instance__)
+        if format_ == 'parquet':
+            writer = pyarrow.parquet.ParquetWriter(file_, schema)
+        else:
+            writer = pyarrow.RecordBatchFileWriter(file_, schema)
+        try:
+            for columns in model.queryset.batches(EXPORT_BATCH_SIZE):
+                arrays = [_to_array(columns[field.name], field.type)
+                          for field in schema]
+                batch = pyarrow.RecordBatch.from_arrays(arrays, schema.names)
+                if format_ == 'parquet':
+                    writer.write_table(pyarrow.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+        finally:
+            writer.close()
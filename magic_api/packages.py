@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib2
+import urlparse
+
+from datapackage import DataPackage
+
+# For import *
+__all__ = ['FileCache', 'CachedDataPackage', 'load_datapackage']
+
+
+class FileCache(object):
+    """Local copies of remote files, stored by the hash of their content.
+
+    The files are revalidated (using their ETag or Last-Modified headers)
+    when they are older than `max_age` seconds. In offline mode, only the
+    local copies are used. The cache can be shared by many processes, since
+    every file is written to a temporary file and then renamed.
+    """
+
+    def __init__(self, path, max_age=300, offline=False):
+        self.path = path
+        self.max_age = max_age
+        self.offline = offline
+        for dirname in ('objects', 'urls'):
+            try:
+                os.makedirs(os.path.join(path, dirname))
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
+
+    def _entry_path(self, url):
+        return os.path.join(self.path, 'urls',
+                            hashlib.sha1(url).hexdigest() + '.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest)
+
+    def _get_entry(self, url):
+        try:
+            with open(self._entry_path(url)) as file_:
+                entry = json.load(file_)
+        except (IOError, ValueError):
+            return None
+        if not os.path.exists(self._object_path(entry['object'])):
+            return None
+        return entry
+
+    def _write(self, path, file_):
+        """Copy `file_` to `path`, returning the SHA-1 of its content."""
+        digest = hashlib.sha1()
+        temp = tempfile.NamedTemporaryFile(dir=self.path, delete=False)
+        try:
+            while True:
+                chunk = file_.read(64 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp.write(chunk)
+            temp.close()
+            os.rename(temp.name, path or self._object_path(digest.hexdigest()))
+        except:
+            os.unlink(temp.name)
+            raise
+        return digest.hexdigest()
+
+    def _set_entry(self, url, entry):
+        self._write(self._entry_path(url), io.BytesIO(json.dumps(entry)))
+
+    def _open(self, entry):
+        return io.open(self._object_path(entry['object']), 'rb')
+
+    def open(self, url):
+        """Open the local copy of `url`, downloading it if needed."""
+        entry = self._get_entry(url)
+        if entry is not None and (self.offline or
+                                  time.time() - entry['checked'] <
+                                  self.max_age):
+            return self._open(entry)
+        if self.offline:
+            raise IOError('{} is not cached (offline mode)'.format(url))
+
+        request = urllib2.Request(url)
+        if entry is not None:
+            if entry.get('etag'):
+                request.add_header('If-None-Match', entry['etag'])
+            if entry.get('last_modified'):
+                request.add_header('If-Modified-Since',
+                                   entry['last_modified'])
+        try:
+            response = urllib2.urlopen(request)
+        except urllib2.HTTPError as error:
+            if error.code != 304 or entry is None:
+                raise
+            # Not modified
+            entry['checked'] = time.time()
+            self._set_entry(url, entry)
+            return self._open(entry)
+        except urllib2.URLError:
+            if entry is None:
+                raise
+            # Use the stale copy when the server can't be reached
+            return self._open(entry)
+
+        try:
+            digest = self._write(None, response)
+        finally:
+            response.close()
+        entry = {
+            'url': url,
+            'object': digest,
+            'etag': response.info().getheader('ETag'),
+            'last_modified': response.info().getheader('Last-Modified'),
+            'checked': time.time()
+        }
+        self._set_entry(url, entry)
+        return self._open(entry)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class CachedDataPackage(DataPackage):
+    """A `DataPackage` that reads remote files through a `FileCache`."""
+
+    # Class attribute, so `Specification` doesn't store it as a key
+    cache = None
+
+    def __init__(self, uri, cache):
+        self.cache = cache
+        super(CachedDataPackage, self).__init__(uri)
+
+    def open_resource(self, path):
+        base = self.base
+        if base and urlparse.urlparse(base).scheme in ('http', 'https'):
+            return self.cache.open(urlparse.urljoin(base, path))
+        return super(CachedDataPackage, self).open_resource(path)
+
+
+def load_datapackage(uri, cache_dir=None, max_age=300, offline=False):
+    """Load the Data Package at `uri`, caching its files in `cache_dir`."""
+    if cache_dir is None:
+        return DataPackage(unicode(uri))
+    cache = FileCache(cache_dir, max_age=max_age, offline=offline)
+    return CachedDataPackage(unicode(uri), cache)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import json
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+# For import *
+__all__ = ['Histogram', 'Profiler', 'profiler']
+
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram(object):
+    """Number of observations in fixed buckets, with their count and sum."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # The last one is for the values greater than the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        # Pairs of (upper bound, count), in order
+        bounds = list(self.buckets) + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': zip(bounds, self.counts)
+        }
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if has_request_context():
+            timings = getattr(g, '_profile_timings', None)
+            if timings is not None:
+                elapsed = time.time() - self.start
+                timings[self.name] = timings.get(self.name, 0) + elapsed
+        return False
+
+
+class Profiler(object):
+    """Time the phases of the requests (`with profiler.phase('query'):`) and
+    the SQL statements, adding them to the `Server-Timing` header of the
+    responses and to histograms, served as JSON at `PROFILING_METRICS_URL`.
+
+    Unless `PROFILING` is set, `phase` is a no-op and nothing else is
+    installed.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.histograms = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILING', False)
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(app.config.get('PROFILING_METRICS_URL', '/_metrics'),
+                         'profiling_metrics', self.metrics)
+        self._listen_sqlalchemy()
+
+    def phase(self, name):
+        """Return a context manager timing the phase `name` of a request."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(name)
+
+    def _listen_sqlalchemy(self):
+        try:
+            from sqlalchemy import event
+            from sqlalchemy.engine import Engine
+        except ImportError:
+            return
+        if event.contains(Engine, 'before_cursor_execute',
+                          _before_cursor_execute):
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _before_request(self):
+        g._profile_start = time.time()
+        g._profile_timings = {}
+        g._profile_sql = [0, 0.0]
+
+    def _after_request(self, response):
+        timings = getattr(g, '_profile_timings', None)
+        if timings is None:
+            return response
+        total = time.time() - g._profile_start
+        statements, sql = g._profile_sql
+        metrics = ['{};dur={:.2f}'.format(name, elapsed * 1000)
+                   for name, elapsed in sorted(timings.iteritems())]
+        metrics.append('sql;dur={:.2f};desc="{} statements"'.format(
+            sql * 1000, statements))
+        metrics.append('total;dur={:.2f}'.format(total * 1000))
+        response.headers.add('Server-Timing', ', '.join(metrics))
+
+        timings = dict(timings, sql=sql, total=total)
+        endpoint = request.endpoint or 'unknown'
+        with self._lock:
+            histograms = self.histograms.setdefault(endpoint, {})
+            for name, elapsed in timings.iteritems():
+                histogram = histograms.get(name)
+                if histogram is None:
+                    histogram = histograms[name] = Histogram()
+                histogram.observe(elapsed * 1000)
+            histogram = histograms.get('sql_statements')
+            if histogram is None:
+                histogram = histograms['sql_statements'] = Histogram()
+            histogram.observe(statements)
+        return response
+
+    def metrics(self):
+        """Histograms of the phases of each endpoint, in milliseconds (and of
+        the number of SQL statements per request).
+        """
+        with self._lock:
+            result = {endpoint: {name: histogram.to_dict()
+                                 for name, histogram in histograms.items()}
+                      for endpoint, histograms in self.histograms.items()}
+        return Response(json.dumps(result), mimetype='application/json')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('_profile_start', []).append(time.time())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    start = conn.info['_profile_start'].pop()
+    if has_request_context():
+        sql = getattr(g, '_profile_sql', None)
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += time.time() - start
+
+
+profiler = Profiler()
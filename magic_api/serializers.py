@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .utils import filter_dict
+
+# For import *
+__all__ = ['Serializer', 'ResourceSerializer']
+
+
+# Max number of projections cached by each resource serializer
+MAX_PROJECTIONS = 256
+
+
+class Serializer(object):
+    """Serialize rows to JSON using a fixed list of properties.
+
+    `properties` is a list of `(property_name, column_name, converter)`,
+    where `converter` turns the column value into a JSON compatible value.
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+
+    def to_dict(self, row):
+        result = {}
+        for property_name, column_name, converter in self.properties:
+            value = getattr(row, column_name, None)
+            if value is not None and converter is not None:
+                value = converter(value)
+            result[property_name] = value
+        return result
+
+    def dumps(self, row):
+        return json.dumps(self.to_dict(row))
+
+    def dumps_many(self, rows):
+        to_dict = self.to_dict
+        return json.dumps([to_dict(row) for row in rows])
+
+    def iter_json(self, rows, buffer_size=1000):
+        """Yield the JSON array of `rows` in chunks of `buffer_size` rows."""
+        to_dict = self.to_dict
+        separator = '['
+        buffer_ = []
+        for row in rows:
+            buffer_.append(separator)
+            buffer_.append(json.dumps(to_dict(row)))
+            separator = ','
+            if len(buffer_) >= buffer_size * 2:
+                yield ''.join(buffer_)
+                buffer_ = []
+        if separator == '[':
+            # No rows
+            buffer_.append(separator)
+        buffer_.append(']')
+        yield ''.join(buffer_)
+
+    def iter_ndjson(self, rows, buffer_size=1000):
+        """Yield `rows` as newline delimited JSON, in chunks of `buffer_size`
+        rows.
+        """
+        to_dict = self.to_dict
+        buffer_ = []
+        for row in rows:
+            buffer_.append(json.dumps(to_dict(row)))
+            buffer_.append('\n')
+            if len(buffer_) >= buffer_size * 2:
+                yield ''.join(buffer_)
+                buffer_ = []
+        if buffer_:
+            yield ''.join(buffer_)
+
+    def _csv_row(self, row):
+        values = []
+        for property_name, column_name, converter in self.properties:
+            value = getattr(row, column_name, None)
+            if value is not None and converter is not None:
+                value = converter(value)
+            if value is None:
+                value = ''
+            elif isinstance(value, bool):
+                value = 'true' if value else 'false'
+            elif isinstance(value, unicode):
+                value = value.encode('utf-8')
+            values.append(value)
+        return values
+
+    def iter_csv(self, rows, buffer_size=1000):
+        """Yield `rows` as CSV, with a header, in chunks of `buffer_size`
+        rows.
+        """
+        buffer_ = io.BytesIO()
+        writer = csv.writer(buffer_)
+        writer.writerow([p[0] for p in self.properties])
+        count = 0
+        for row in rows:
+            writer.writerow(self._csv_row(row))
+            count += 1
+            if count >= buffer_size:
+                yield buffer_.getvalue()
+                buffer_.seek(0)
+                buffer_.truncate()
+                count = 0
+        yield buffer_.getvalue()
+
+    def dumps_csv(self, rows):
+        return ''.join(self.iter_csv(rows, buffer_size=float('inf')))
+
+    def dumps_msgpack(self, row):
+        return msgpack.packb(self.to_dict(row), use_bin_type=True)
+
+    def dumps_many_msgpack(self, rows):
+        to_dict = self.to_dict
+        return msgpack.packb([to_dict(row) for row in rows],
+                             use_bin_type=True)
+
+
+class ResourceSerializer(object):
+    """Create and cache the serializers for the projections of a resource.
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+        self.property_names = [p[0] for p in properties]
+        self._properties = {p[0]: p for p in properties}
+        self._projections = {}
+
+    def select(self, select):
+        """Return the serializer for a `select` argument (a comma separated
+        list of properties, prefixed with `-` to be removed).
+        """
+        serializer = self._projections.get(select)
+        if serializer is None:
+            selected = filter_dict(self._properties, select.split(','))
+            serializer = Serializer([self._properties[name] for name
+                                     in self.property_names
+                                     if name in selected])
+            if len(self._projections) < MAX_PROJECTIONS:
+                self._projections[select] = serializer
+        return serializer
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import itertools
 import unicodedata
 
 # For import *
@@ -34,3 +36,38 @@ def get_type(types, field):
 
 def get_resource_by_name(datapackage, resource_name):
     return next((r for r in datapackage.resources if r.name == resource_name))
+
+
+def filter_dict(dict_, keys):
+    remove = []
+    result = {}
+
+    for key in keys:
+        if key.startswith('-'):
+            remove.append(key)
+        elif key in dict_:
+            result[key] = dict_[key]
+
+    result = result or dict_.copy()
+
+    for key in remove:
+        key = key[1:]
+        if key in result:
+            del result[key]
+
+    return result
+
+
+def chunks(iterable, size):
+    """Lazily split `iterable` into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def row_hash(row):
+    """Return a hash of the values of a row (a dict)."""
+    return hashlib.sha1(repr(sorted(row.iteritems()))).hexdigest()
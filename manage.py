@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask.ext.script import Manager
+import os
+import subprocess
+import sys
+
+from flask.ext.script import Command, Manager
 
 from magic_api.app.extensions import db
 from magic_api.app import create_app
@@ -12,6 +16,8 @@ manager = Manager(create_app)
 manager.add_option('-i', '--inst', dest='instance_folder', required=False)
 manager.add_option('-b', '--backend', dest='backend', required=False)
 manager.add_option('-d', '--datapackage', dest='datapackage', required=True)
+manager.add_option('-o', '--offline', dest='offline', action='store_true',
+                   required=False)
 
 
 @manager.command
@@ -23,22 +29,61 @@ def run():
 @manager.command
 def test():
     """Run tests."""
-    pass
+    # In a new interpreter, since the tests create their own app and the
+    # resources can only be registered on one
+    sys.exit(subprocess.call(
+        [sys.executable, '-m', 'unittest', 'discover', '-v', '-s', 'tests',
+         '-t', '.'],
+        cwd=os.path.dirname(os.path.abspath(__file__))))
 
 
 @manager.command
 def initdb():
     """Init or reset database."""
     with manager.app.app_context():
+        # The tables are defined by the models, which may be lazy
+        manager.app._resources_maker.models_maker.create_models()
         db.drop_all()
         db.create_all()
 
 
 @manager.command
-def importdata():
+def warmup():
+    """Create every resource and read a row of each one."""
+    with manager.app.app_context():
+        timings = manager.app._resources_maker.warmup()
+    for resource_name, elapsed in timings:
+        print '     {}: {:.2f}s'.format(resource_name, elapsed)
+
+
+@manager.option('-s', '--batch-size', dest='batch_size', type=int,
+                default=None, help='Number of rows inserted per transaction')
+@manager.option('-w', '--workers', dest='workers', type=int, default=None,
+                help='Number of processes reading the resources')
+@manager.option('-n', '--incremental', dest='incremental', default=False,
+                action='store_true',
+                help='Only import the rows that changed since the last import')
+def importdata(batch_size=None, workers=None, incremental=False):
     """Import the data to the database."""
     with manager.app.app_context():
-        manager.app._resources_maker.models_maker.populate()
+        models_maker = manager.app._resources_maker.models_maker
+        models_maker.populate(batch_size=batch_size, workers=workers,
+                              incremental=incremental)
+
+
+class Benchmark(Command):
+    """Benchmark the backends, see `python -m magic_api.benchmark -h`."""
+    capture_all_args = True
+
+    def run(self, args):
+        # In a new interpreter, since the benchmark creates its own apps and
+        # the resources can only be registered on one
+        sys.exit(subprocess.call(
+            [sys.executable, '-m', 'magic_api.benchmark'] + args,
+            cwd=os.path.dirname(os.path.abspath(__file__))))
+
+
+manager.add_command('benchmark', Benchmark())
 
 
 if __name__ == "__main__":
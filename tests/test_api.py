@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import decimal
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from werkzeug.exceptions import HTTPException
+
+from magic_api.api import decode_cursor, encode_cursor
+from magic_api.app import create_app
+from magic_api.app.config import DefaultConfig
+from magic_api.app.extensions import db
+
+
+URL = '/api/test/people'
+
+PEOPLE = """name,country,age,born,score
+Ana,BRA,30,1985-01-01,1.5
+Bob,USA,25,1990-06-01,2.5
+Caio,BRA,41,1974-03-02,0.5
+Dan,USA,25,1990-01-01,3.5
+Eva,FRA,35,1980-12-31,2.0
+"""
+
+# The API resources can only be registered on one app, so the tests share it
+app = None
+path = None
+
+
+def setUpModule():
+    global app, path
+    path = tempfile.mkdtemp()
+    descriptor = {
+        'name': 'test',
+        'resources': [{
+            'name': 'people',
+            'path': 'people.csv',
+            'schema': {'fields': [{'name': 'name', 'type': 'string'},
+                                  {'name': 'country', 'type': 'string'},
+                                  {'name': 'age', 'type': 'integer'},
+                                  {'name': 'born', 'type': 'date'},
+                                  {'name': 'score', 'type': 'number'}]}
+        }]
+    }
+    with open(os.path.join(path, 'datapackage.json'), 'w') as file_:
+        json.dump(descriptor, file_)
+    with open(os.path.join(path, 'people.csv'), 'w') as file_:
+        file_.write(PEOPLE)
+
+    class Config(DefaultConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///{}'.format(
+            os.path.join(path, 'db.sqlite'))
+
+    app = create_app(Config, datapackage=path + '/', instance_folder=path)
+    with app.app_context():
+        db.create_all()
+        app._resources_maker.models_maker.populate()
+
+
+def tearDownModule():
+    shutil.rmtree(path)
+
+
+class CursorTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        values = [datetime.date(2010, 1, 1), decimal.Decimal('1.5'), u'BRA',
+                  None, 3]
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+
+    def test_invalid(self):
+        for cursor in ('!', 'e30', encode_cursor({'_uid': 1})):
+            with self.assertRaises(HTTPException) as context:
+                decode_cursor(cursor)
+            self.assertEqual(context.exception.code, 400)
+
+
+class APITestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get_json(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200, response.get_data())
+        return json.loads(response.get_data())
+
+    def test_cursor_pagination(self):
+        for order in ('_uid', '-age', 'country,-born'):
+            expected = self.get_json('{}?order={}'.format(URL, order))
+            rows = []
+            cursor = ''
+            while cursor is not None:
+                response = self.client.get('{}?order={}&per_page=2&cursor={}'
+                                           .format(URL, order, cursor))
+                self.assertEqual(response.status_code, 200)
+                rows += json.loads(response.get_data())
+                cursor = response.headers.get('X-Next-Cursor')
+            self.assertEqual(rows, expected)
+
+    def test_list(self):
+        rows = self.get_json('{}?per_page=2&page=1'.format(URL))
+        self.assertEqual([row['name'] for row in rows], ['Caio', 'Dan'])
+        self.assertEqual(rows[0], {'_uid': 3, 'name': 'Caio',
+                                   'country': 'BRA', 'age': 41,
+                                   'born': '1974-03-02', 'score': 0.5})
+        rows = self.get_json('{}?select=name,age'.format(URL))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(sorted(rows[0]), ['age', 'name'])
+
+    def test_single(self):
+        row = self.get_json('{}/2'.format(URL))
+        self.assertEqual(row['name'], 'Bob')
+        self.assertEqual(row['born'], '1990-06-01')
+
+    def test_etag(self):
+        response = self.client.get(URL)
+        etag = response.headers['ETag']
+        # Weak, see `_set_etag`
+        self.assertTrue(etag.lower().startswith('w/'))
+        response = self.client.get(URL, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        # Other arguments, other ETag
+        response = self.client.get('{}?per_page=1'.format(URL),
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_typed_filters(self):
+        rows = self.get_json('{}?age=25'.format(URL))
+        self.assertEqual([row['name'] for row in rows], ['Bob', 'Dan'])
+        rows = self.get_json('{}?born=1985-01-01'.format(URL))
+        self.assertEqual([row['name'] for row in rows], ['Ana'])
+        rows = self.get_json('{}?score=2.0'.format(URL))
+        self.assertEqual([row['name'] for row in rows], ['Eva'])
+        for value in ('abc', 'NaN', 'sNaN', 'Infinity', '-inf'):
+            response = self.client.get('{}?score={}'.format(URL, value))
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid number',
+                          json.loads(response.get_data())['message'])
+
+    def test_batch_lookup(self):
+        response = self.client.post(URL, data=json.dumps({
+            '_uid': [4, 99, 1], 'select': 'name'}))
+        self.assertEqual(response.status_code, 200)
+        # In the order of the `_uid`s, without the unknown ones
+        self.assertEqual(json.loads(response.get_data()),
+                         [{'name': 'Dan'}, {'name': 'Ana'}])
+        response = self.client.post(URL, data='{"_uid": ["x"]}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_formats(self):
+        response = self.client.get('{}?select=name,age&per_page=2'
+                                   .format(URL),
+                                   headers={'Accept': 'text/csv'})
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertEqual(response.get_data().splitlines(),
+                         ['name,age', 'Ana,30', 'Bob,25'])
+        response = self.client.get('{}?select=name&per_page=2'.format(URL),
+                                   headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['name'] for line
+                          in response.get_data().splitlines()],
+                         ['Ana', 'Bob'])
+
+    def test_gzip(self):
+        expected = self.get_json('{}?stream=true'.format(URL))
+        response = self.client.get('{}?stream=true'.format(URL),
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        body = gzip.GzipFile(fileobj=StringIO(response.get_data())).read()
+        self.assertEqual(json.loads(body), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from flask import Flask, Response
+
+from magic_api.cache import LRUCache, ResponseCache
+
+
+class Backend(object):
+    def __init__(self):
+        self.version = 1
+
+    def get_data_version(self, model):
+        return self.version
+
+
+class QuerySet(object):
+    def __init__(self, backend):
+        self.backend = backend
+
+
+class Model(object):
+    queryset = QuerySet(Backend())
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cache = ResponseCache(version_check_interval=0)
+        self.calls = []
+        Model.queryset.backend.version = 1
+
+    def view(self, status=200):
+        def view():
+            self.calls.append(status)
+            return Response('body', status=status)
+        return self.cache.cached(view, Model)
+
+    def get(self, view, headers=None):
+        with self.app.test_request_context('/people', headers=headers):
+            return view()
+
+    def test_cached(self):
+        view = self.view()
+        response = self.get(view)
+        etag, weak = response.get_etag()
+        self.assertTrue(weak)
+        response = self.get(view)
+        self.assertEqual(response.get_data(), 'body')
+        self.assertEqual(response.get_etag(), (etag, True))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_not_modified(self):
+        view = self.view()
+        etag = self.get(view).headers['ETag']
+        response = self.get(view, {'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        # The same ETag the client was given
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_data_version(self):
+        view = self.view()
+        etag = self.get(view).headers['ETag']
+        Model.queryset.backend.version = 2
+        response = self.get(view, {'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_errors(self):
+        view = self.view(404)
+        response = self.get(view)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+        self.get(view)
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from datapackage import DataPackage
+
+from magic_api.dal.backends.duckdbbackend import DuckDBBackend, duckdb
+from magic_api.dal.model import ModelsMaker
+
+
+@unittest.skipIf(duckdb is None, 'duckdb is not installed')
+class DuckDBBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        descriptor = {
+            'name': 'test',
+            'resources': [{
+                'name': 'people',
+                'path': 'people.csv',
+                'schema': {'fields': [{'name': 'name', 'type': 'string'},
+                                      {'name': 'age', 'type': 'integer'}]}
+            }]
+        }
+        with open(os.path.join(self.path, 'datapackage.json'), 'w') as file_:
+            json.dump(descriptor, file_)
+        with open(os.path.join(self.path, 'people.csv'), 'w') as file_:
+            file_.write('name,age\n,1\nx,2\n,3\ny,4\n')
+        datapackage = DataPackage(unicode(self.path + '/'))
+        self.models_maker = ModelsMaker(datapackage, DuckDBBackend())
+        self.model = self.models_maker.get_model('people')
+        self.models_maker.populate()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_empty_strings(self):
+        queryset = self.model.queryset
+        self.assertEqual(queryset.filter(name='').count(), 2)
+        self.assertEqual(queryset.filter(name='x').count(), 1)
+
+    def test_seek_empty_strings(self):
+        queryset = self.model.queryset.only('name')
+        names = []
+        values = None
+        while True:
+            rows = queryset.seek(['name', '_uid'], values).limit(2).values()
+            if not rows:
+                break
+            names += [row.name for row in rows]
+            values = [rows[-1].name, rows[-1]._uid]
+        self.assertEqual(names, ['', '', 'x', 'y'])
+
+    def test_seek_nulls(self):
+        with open(os.path.join(self.path, 'people.csv'), 'w') as file_:
+            file_.write('name,age\na,\nb,2\nc,\nd,1\ne,2\n')
+        self.models_maker.populate()
+        # The NULLs are the smallest values
+        for order, expected in ((['age', '_uid'], 'acdbe'),
+                                (['-age', '_uid'], 'bedac'),
+                                (['-age', '-_uid'], 'ebdca')):
+            names = ''
+            values = None
+            while True:
+                rows = self.model.queryset.seek(order, values).limit(2).values()
+                if not rows:
+                    break
+                names += ''.join(row.name for row in rows)
+                values = [rows[-1].age, rows[-1]._uid]
+            self.assertEqual(names, expected)
+
+    def test_iterate_and_batches(self):
+        queryset = self.model.queryset
+        rows = list(queryset.iterate(batch_size=3))
+        self.assertEqual([row._uid for row in rows], [1, 2, 3, 4])
+        rows = list(queryset.offset(1).limit(2).iterate(batch_size=1))
+        self.assertEqual([row._uid for row in rows], [2, 3])
+        rows = list(queryset.seek(['-age']).iterate(batch_size=3))
+        self.assertEqual([row.age for row in rows], [4, 3, 2, 1])
+        batches = list(queryset.only('age').batches(batch_size=3))
+        self.assertEqual([sorted(batch) for batch in batches],
+                         [['_uid', 'age']] * 2)
+        self.assertEqual([list(batch['age']) for batch in batches],
+                         [[1, 2, 3], [4]])
+
+    def test_get_only(self):
+        row = self.model.queryset.only('age').get(2)
+        self.assertEqual(row.age, 2)
+        self.assertFalse(hasattr(row, 'name'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from datapackage import DataPackage
+
+from magic_api.dal.backends.pandasbackend import PandasBackend, pandas
+from magic_api.dal.model import ModelsMaker
+from magic_api.export import Exporter, pyarrow
+
+
+@unittest.skipIf(pyarrow is None or pandas is None,
+                 'pyarrow or pandas is not installed')
+class ExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        descriptor = {
+            'name': 'test',
+            'resources': [{
+                'name': 'people',
+                'path': 'people.csv',
+                'schema': {'fields': [{'name': 'name', 'type': 'string'},
+                                      {'name': 'age', 'type': 'integer'}]}
+            }]
+        }
+        with open(os.path.join(self.path, 'datapackage.json'), 'w') as file_:
+            json.dump(descriptor, file_)
+        with open(os.path.join(self.path, 'people.csv'), 'w') as file_:
+            file_.write('name,age\nx,1\ny,2\n')
+        datapackage = DataPackage(unicode(self.path + '/'))
+        self.backend = PandasBackend()
+        self.models_maker = ModelsMaker(datapackage, self.backend)
+        self.model = self.models_maker.get_model('people')
+        self.models_maker.populate()
+        self.exporter = Exporter(os.path.join(self.path, 'exports'),
+                                 version_check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_parquet(self):
+        path = self.exporter.export(self.model, 'parquet')
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column('name').to_pylist(), ['x', 'y'])
+        self.assertEqual(table.column('age').to_pylist(), [1, 2])
+        # Written once for each data version
+        self.assertEqual(self.exporter.export(self.model, 'parquet'), path)
+
+    def test_old_versions(self):
+        paths = []
+        for age in (3, 4, 5):
+            paths.append(self.exporter.export(self.model, 'arrow'))
+            self.backend.populate(self.model, data=[{'name': 'x',
+                                                     'age': age}])
+        paths.append(self.exporter.export(self.model, 'arrow'))
+        self.assertEqual(len(set(paths)), 4)
+        # The previous version is kept, for the other processes
+        self.assertEqual([os.path.exists(path) for path in paths],
+                         [False, False, True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from datapackage import DataPackage
+
+from magic_api.dal.backends.pandasbackend import PandasBackend, pandas
+from magic_api.dal.model import ModelsMaker
+
+
+@unittest.skipIf(pandas is None, 'pandas is not installed')
+class PandasBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        descriptor = {
+            'name': 'test',
+            'resources': [{
+                'name': 'people',
+                'path': 'people.csv',
+                'schema': {'fields': [{'name': 'name', 'type': 'string'},
+                                      {'name': 'age', 'type': 'integer'},
+                                      {'name': 'born', 'type': 'date'}]}
+            }]
+        }
+        with open(os.path.join(self.path, 'datapackage.json'), 'w') as file_:
+            json.dump(descriptor, file_)
+        with open(os.path.join(self.path, 'people.csv'), 'w') as file_:
+            file_.write('name,age,born\nx,2,2000-01-01\ny,1,1990-01-01\n'
+                        'z,2,2010-01-01\n')
+        datapackage = DataPackage(unicode(self.path + '/'))
+        self.backend = PandasBackend()
+        self.models_maker = ModelsMaker(datapackage, self.backend)
+        self.model = self.models_maker.get_model('people')
+        self.models_maker.populate()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_order(self):
+        queryset = self.model.queryset
+        rows = queryset.seek(['-_uid']).values()
+        self.assertEqual([row._uid for row in rows], [3, 2, 1])
+        rows = queryset.seek(['-age', '_uid']).values()
+        self.assertEqual([row.name for row in rows], ['x', 'z', 'y'])
+        rows = queryset.seek(['-age', '_uid'], [2, 1]).values()
+        self.assertEqual([row.name for row in rows], ['z', 'y'])
+
+    def test_seek_nulls(self):
+        uids = range(1, 6)
+        self.backend.frames[self.model] = pandas.DataFrame(
+            {'_uid': uids, 'name': list('abcde'),
+             'age': [None, 2, None, 1, 2]}, index=uids)
+        # The NULLs are the smallest values
+        for order, expected in ((['age', '_uid'], 'acdbe'),
+                                (['-age', '_uid'], 'bedac'),
+                                (['-age', '-_uid'], 'ebdca')):
+            names = ''
+            values = None
+            while True:
+                rows = self.model.queryset.seek(order, values).limit(2).values()
+                if not rows:
+                    break
+                names += ''.join(row.name for row in rows)
+                values = [rows[-1].age, rows[-1]._uid]
+            self.assertEqual(names, expected)
+
+    def test_aggregate_dates(self):
+        rows = self.model.queryset.aggregate(
+            ['age'], first=('min', 'born'), count=('count', None))
+        self.assertEqual(
+            sorted((row.age, row.first, row.count) for row in rows),
+            [(1, datetime.date(1990, 1, 1), 1),
+             (2, datetime.date(2000, 1, 1), 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
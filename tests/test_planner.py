@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from magic_api.dal.planner import (arity_bucket, plan, selectivity,
+                                   served_predicates)
+
+
+STATS = {'_uid': 216, 'country_code': 4, 'year': 54, 'cpi': 216}
+
+INDEXES = {
+    'PRIMARY': ('_uid', ),
+    'ix_cpi_country_code': ('country_code', ),
+    'ix_cpi_year': ('year', ),
+    'ix_cpi_cpi': ('cpi', ),
+    'ix_cpi_country_code_year': ('country_code', 'year')
+}
+
+
+class PlannerTestCase(unittest.TestCase):
+    def test_arity_bucket(self):
+        self.assertEqual([arity_bucket(size) for size in (0, 1, 2, 3, 5, 8)],
+                         [1, 1, 2, 4, 8, 8])
+
+    def test_selectivity(self):
+        self.assertEqual(selectivity(('in', 'country_code', ['BRA']), STATS),
+                         0.25)
+        self.assertEqual(selectivity(('in', 'country_code', []), STATS), 0)
+        # Rounded like the statements cache, not by distinct values
+        self.assertEqual(
+            selectivity(('in', 'year', [1, 1, 2]), STATS),
+            selectivity(('in', 'year', [1, 2, 3]), STATS))
+        self.assertEqual(selectivity(('eq', 'unknown', 1), {}), 0.1)
+
+    def test_served_predicates(self):
+        predicates = [('gte', 'year', 2005), ('in', 'country_code', ['BRA'])]
+        self.assertEqual(
+            served_predicates(('country_code', 'year'), predicates),
+            [('in', 'country_code', ['BRA']), ('gte', 'year', 2005)])
+        # A comparison ends the usable prefix of the index
+        self.assertEqual(
+            served_predicates(('year', 'country_code'), predicates),
+            [('gte', 'year', 2005)])
+        self.assertEqual(served_predicates(('cpi', 'year'), predicates), [])
+
+    def test_composite_index(self):
+        predicates = [('gte', 'year', 2005), ('lt', 'cpi', 100),
+                      ('in', 'country_code', ['BRA', 'USA'])]
+        ordered, index = plan(predicates, STATS, INDEXES)
+        self.assertEqual(index, 'ix_cpi_country_code_year')
+        self.assertEqual(ordered, [('in', 'country_code', ['BRA', 'USA']),
+                                   ('gte', 'year', 2005),
+                                   ('lt', 'cpi', 100)])
+
+    def test_most_selective_first(self):
+        predicates = [('in', 'country_code', ['BRA']), ('eq', 'cpi', 3.0)]
+        ordered, index = plan(predicates, STATS, INDEXES)
+        self.assertEqual(index, 'ix_cpi_cpi')
+        self.assertEqual(ordered, [('eq', 'cpi', 3.0),
+                                   ('in', 'country_code', ['BRA'])])
+
+    def test_same_shape_same_plan(self):
+        stats = {'a': 4, 'b': 3}
+        first, _ = plan([('in', 'a', ['x', 'x']), ('eq', 'b', 1)], stats)
+        second, _ = plan([('in', 'a', ['x', 'y']), ('eq', 'b', 1)], stats)
+        self.assertEqual(first, [('eq', 'b', 1), ('in', 'a', ['x', 'x'])])
+        self.assertEqual(second, [('eq', 'b', 1), ('in', 'a', ['x', 'y'])])
+
+    def test_without_indexes(self):
+        ordered, index = plan([('gt', 'cpi', 1), ('in', '_uid', [1])])
+        self.assertIsNone(index)
+        self.assertEqual(ordered, [('in', '_uid', [1]), ('gt', 'cpi', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy
+import sqlalchemy.orm
+from datapackage import DataPackage
+
+from magic_api.dal.backends.sqlalchemybackend import SQLAlchemyBackend
+from magic_api.dal.model import ModelsMaker
+
+
+class SQLAlchemyBackendTestCase(unittest.TestCase):
+    primary_key = None
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        schema = {'fields': [{'name': 'name', 'type': 'string'},
+                             {'name': 'age', 'type': 'integer'}]}
+        if self.primary_key:
+            schema['primaryKey'] = self.primary_key
+        descriptor = {
+            'name': 'test',
+            'resources': [{
+                'name': 'people',
+                'path': 'people.csv',
+                'schema': schema
+            }]
+        }
+        with open(os.path.join(self.path, 'datapackage.json'), 'w') as file_:
+            json.dump(descriptor, file_)
+        self.write_csv('name,age\nx,1\ny,2\nz,3\n')
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        session = sqlalchemy.orm.scoped_session(
+            sqlalchemy.orm.sessionmaker(bind=self.engine))
+        self.backend = SQLAlchemyBackend(session, sqlalchemy.MetaData())
+        datapackage = DataPackage(unicode(self.path + '/'))
+        self.models_maker = ModelsMaker(datapackage, self.backend)
+        self.model = self.models_maker.get_model('people')
+        self.backend.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.backend.session.remove()
+        shutil.rmtree(self.path)
+
+    def write_csv(self, data):
+        with open(os.path.join(self.path, 'people.csv'), 'w') as file_:
+            file_.write(data)
+
+    def rows(self):
+        table = self.model.__table__
+        return self.engine.execute(
+            sqlalchemy.select([table.c._uid, table.c.name, table.c.age])
+            .order_by(table.c._uid)).fetchall()
+
+    def test_seek_nulls(self):
+        self.engine.execute(self.model.__table__.insert(), [
+            {'name': 'a', 'age': None}, {'name': 'b', 'age': 2},
+            {'name': 'c', 'age': None}, {'name': 'd', 'age': 1},
+            {'name': 'e', 'age': 2}])
+        # The NULLs are the smallest values
+        for order, expected in ((['age', '_uid'], 'acdbe'),
+                                (['-age', '_uid'], 'bedac'),
+                                (['-age', '-_uid'], 'ebdca')):
+            names = ''
+            values = None
+            while True:
+                rows = self.model.queryset.seek(order, values).limit(2).all()
+                if not rows:
+                    break
+                names += ''.join(row.name for row in rows)
+                values = [rows[-1].age, rows[-1]._uid]
+            self.assertEqual(names, expected)
+
+    def test_update(self):
+        self.models_maker.populate()
+        self.write_csv('name,age\nx,1\nz,4\nw,5\n')
+        self.backend.update(self.model)
+        # The unchanged rows keep their `_uid`
+        self.assertEqual(self.rows(), [(1, 'x', 1), (4, 'z', 4), (5, 'w', 5)])
+
+    def test_statement_cache(self):
+        self.models_maker.populate()
+        statements = self.backend.statements._items
+        queryset = self.model.queryset
+        self.assertEqual([row.name for row in queryset.filter(age=1).values()],
+                         ['x'])
+        self.assertEqual([row.name for row in queryset.filter(age=2).values()],
+                         ['y'])
+        self.assertEqual(len(statements), 1)
+        # The `IN` lists of 3 and 4 values have the same statement
+        rows = queryset.in_(age=[1, 2, 3]).values()
+        self.assertEqual(len(rows), 3)
+        rows = queryset.in_(age=[3, 4, 5, 6]).values()
+        self.assertEqual([row.name for row in rows], ['z'])
+        self.assertEqual(len(statements), 2)
+        # Other orders, limits or columns are other statements
+        queryset.filter(age=1).limit(1).values()
+        queryset.filter(age=1).seek(['-age']).values()
+        queryset.filter(age=1).only('name').values()
+        self.assertEqual(len(statements), 5)
+        # but not for the counts
+        self.assertEqual(queryset.filter(age=1).count(), 1)
+        self.assertEqual(queryset.filter(age=2).seek(['-age']).count(), 1)
+        self.assertEqual(len(statements), 6)
+
+
+class PrimaryKeyTestCase(SQLAlchemyBackendTestCase):
+    primary_key = ['name']
+
+    def test_update(self):
+        self.models_maker.populate()
+        self.write_csv('name,age\nx,1\nz,4\nw,5\n')
+        self.backend.update(self.model)
+        # The rows with the same key are updated
+        self.assertEqual(self.rows(), [(1, 'x', 1), (3, 'z', 4), (4, 'w', 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()